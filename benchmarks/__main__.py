@@ -0,0 +1,130 @@
+import argparse
+import asyncio
+import json
+import os
+import platform
+import sys
+import tempfile
+from datetime import datetime, timezone
+from importlib import metadata as importlib_metadata
+from typing import Optional
+
+from sqlalchemy import create_engine
+
+from fox_orm import FoxOrm
+
+from benchmarks.runner import run_scenarios, measure_memory
+
+DEFAULT_SIZES = [10, 100, 1000]
+PACKAGES = ['fox-orm', 'pydantic', 'sqlalchemy', 'databases']
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks',
+        description='Compares fox_orm with raw databases calls',
+    )
+    parser.add_argument(
+        '-s',
+        '--scenario',
+        action='append',
+        help='scenario to run, can be repeated, all scenarios are run by default',
+    )
+    parser.add_argument(
+        '-n',
+        '--size',
+        action='append',
+        type=int,
+        help=f'number of rows or objects, can be repeated, default: {DEFAULT_SIZES}',
+    )
+    parser.add_argument('-r', '--repeat', type=int, default=10)
+    parser.add_argument(
+        '-w', '--warmup', type=int, default=2, help='runs excluded from results'
+    )
+    parser.add_argument(
+        '--db-uri',
+        help='database to use, tables are created in it, '
+        'temporary SQLite database by default',
+    )
+    parser.add_argument('-o', '--output', help='write results to JSON file')
+    return parser.parse_args()
+
+
+def package_version(name: str) -> Optional[str]:
+    try:
+        return importlib_metadata.version(name)
+    except importlib_metadata.PackageNotFoundError:
+        return None
+
+
+def print_result(result: dict) -> None:
+    ratio = result.get('baseline_ratio')
+    print(
+        f'{result["scenario"]:<24}{result["size"]:>7}  {result["variant"]:<22}'
+        f'median {result["median"] * 1000:>10.3f} ms  '
+        f'p95 {result["p95"] * 1000:>10.3f} ms'
+        + (f'  x{ratio:.2f}' if ratio is not None else '')
+    )
+
+
+async def run(args, db_uri: str) -> dict:
+    # Models are imported after FoxOrm.init, like in applications
+    # pylint: disable=import-outside-toplevel
+    from benchmarks.models import Group
+    from benchmarks.scenarios import SCENARIOS
+
+    scenarios = SCENARIOS
+    if args.scenario:
+        unknown = set(args.scenario) - SCENARIOS.keys()
+        if unknown:
+            raise SystemExit(
+                f'Unknown scenarios: {", ".join(sorted(unknown))}, '
+                f'available: {", ".join(SCENARIOS)}'
+            )
+        scenarios = {x: SCENARIOS[x] for x in args.scenario}
+    sizes = args.size or DEFAULT_SIZES
+    FoxOrm.metadata.create_all(create_engine(db_uri))
+    await FoxOrm.connect()
+    try:
+        results = await run_scenarios(
+            scenarios, sizes, args.repeat, args.warmup, print_result
+        )
+    finally:
+        await FoxOrm.disconnect()
+    rows = [{'pkey': i, 'name': 'memory'} for i in range(max(sizes))]
+    memory = {
+        'dict': measure_memory(lambda: [dict(x) for x in rows], len(rows)),
+        'fox_orm': measure_memory(
+            lambda: [Group._from_row(x) for x in rows], len(rows)
+        ),
+    }
+    print(f'Memory per object: {memory}')
+    return {
+        'meta': {
+            'date': datetime.now(timezone.utc).isoformat(),
+            'python': sys.version,
+            'platform': platform.platform(),
+            'packages': {x: package_version(x) for x in PACKAGES},
+            'dialect': FoxOrm.dialect,
+            'sizes': sizes,
+            'repeat': args.repeat,
+            'warmup': args.warmup,
+        },
+        'results': results,
+        'memory_per_object': memory,
+    }
+
+
+def main():
+    args = parse_args()
+    with tempfile.TemporaryDirectory() as directory:
+        db_uri = args.db_uri or f'sqlite:///{os.path.join(directory, "bench.db")}'
+        FoxOrm.init(db_uri)
+        report = asyncio.run(run(args, db_uri))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
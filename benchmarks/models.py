@@ -0,0 +1,24 @@
+from typing import Optional
+
+from fox_orm import FoxOrm, OrmModel
+from fox_orm.fields import pk
+from fox_orm.relations import ManyToMany
+
+
+class Item(OrmModel):
+    pkey: Optional[int] = pk
+    text: str
+    n: int
+    data: dict
+
+
+class Group(OrmModel):
+    pkey: Optional[int] = pk
+    name: str
+
+    items: ManyToMany[Item] = ManyToMany(to='benchmarks.models.Item', via='group_item')
+
+
+FoxOrm.init_relations()
+
+group_item = FoxOrm.metadata.tables['group_item']
@@ -0,0 +1,88 @@
+import math
+import statistics
+import time
+import tracemalloc
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+# Prepares data for one run without measuring time, returns the measured function
+PREPARE = Callable[[int], Awaitable[Callable[[], Awaitable[Any]]]]
+
+BASELINE = 'databases'
+
+
+def percentile(timings: List[float], p: float) -> float:
+    """
+    Nearest-rank percentile
+    """
+    timings = sorted(timings)
+    return timings[max(math.ceil(p / 100 * len(timings)) - 1, 0)]
+
+
+def summarize(timings: List[float], size: int) -> Dict[str, float]:
+    median = statistics.median(timings)
+    return {
+        'median': median,
+        'p95': percentile(timings, 95),
+        'min': min(timings),
+        'mean': statistics.mean(timings),
+        'median_per_item': median / size,
+    }
+
+
+async def measure(prepare: PREPARE, size: int, repeat: int, warmup: int) -> List[float]:
+    timings = []
+    for i in range(warmup + repeat):
+        run = await prepare(size)
+        start = time.perf_counter()
+        await run()
+        elapsed = time.perf_counter() - start
+        if i >= warmup:
+            timings.append(elapsed)
+    return timings
+
+
+async def run_scenarios(
+    scenarios: Dict[str, Dict[str, PREPARE]],
+    sizes: List[int],
+    repeat: int,
+    warmup: int,
+    report: Optional[Callable[[dict], None]] = None,
+) -> List[dict]:
+    results = []
+    for name, variants in scenarios.items():
+        for size in sizes:
+            baseline_median = None
+            # Baseline is measured first, so other variants can be compared to it
+            for variant in sorted(variants, key=lambda x: x != BASELINE):
+                timings = await measure(variants[variant], size, repeat, warmup)
+                result = {
+                    'scenario': name,
+                    'variant': variant,
+                    'size': size,
+                    'repeat': repeat,
+                    **summarize(timings, size),
+                    'timings': timings,
+                }
+                if variant == BASELINE:
+                    baseline_median = result['median']
+                elif baseline_median:
+                    result['baseline_ratio'] = result['median'] / baseline_median
+                results.append(result)
+                if report is not None:
+                    report(result)
+    return results
+
+
+def measure_memory(create: Callable[[], List[Any]], count: int) -> float:
+    """
+    Returns memory in bytes allocated per object by create
+    """
+    tracemalloc.start()
+    try:
+        memory_start = tracemalloc.get_traced_memory()[0]
+        objects = create()
+        memory = tracemalloc.get_traced_memory()[0] - memory_start
+    finally:
+        tracemalloc.stop()
+    del objects
+    return memory / count
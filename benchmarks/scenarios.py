@@ -0,0 +1,416 @@
+import json
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from pydantic import BaseModel
+from sqlalchemy import (
+    Column,
+    DateTime,
+    Integer,
+    JSON,
+    MetaData,
+    String,
+    Table,
+)
+
+from fox_orm import FoxOrm, OrmModel
+from fox_orm.fields import pk
+
+from benchmarks.models import Item, Group, group_item
+from benchmarks.runner import PREPARE, BASELINE
+
+FOX_ORM = 'fox_orm'
+
+SCENARIOS: Dict[str, Dict[str, PREPARE]] = {}
+
+item_table = Item.__table__
+
+# databases can't bind parameters of SQLAlchemy update and select queries,
+# so baselines use raw SQL for them
+UPDATE_QUERY = 'UPDATE item SET n = :n WHERE pkey = :pkey'
+GET_QUERY = 'SELECT * FROM item WHERE pkey = :pkey'
+
+
+def scenario(name: str, variant: str):
+    def decorator(prepare: PREPARE) -> PREPARE:
+        SCENARIOS.setdefault(name, {})[variant] = prepare
+        return prepare
+
+    return decorator
+
+
+def item_values(tag: str, size: int) -> List[dict]:
+    return [
+        {'text': tag, 'n': i, 'data': {'index': i, 'tags': ['a', 'b']}}
+        for i in range(size)
+    ]
+
+
+_seeded: Dict[str, List[int]] = {}
+
+
+async def seed(tag: str, size: int) -> List[int]:
+    """
+    Inserts size items once and returns their ids
+    """
+    key = f'{tag}_{size}'
+    if key not in _seeded:
+        items = await Item.insert_many([Item(**x) for x in item_values(key, size)])
+        _seeded[key] = [x.pkey for x in items]
+    return _seeded[key]
+
+
+async def seed_group(size: int) -> int:
+    key = f'group_{size}'
+    if key not in _seeded:
+        group = await Group(name=key).save()
+        await seed('group', size)
+        for item in await Item.select_all(seeded_where('group', size)):
+            group.items.add(item)
+        await group.items.save()
+        _seeded[key] = [group.pkey]
+    return _seeded[key][0]
+
+
+def seeded_where(tag: str, size: int):
+    return item_table.c.text == f'{tag}_{size}'
+
+
+@scenario('insert', BASELINE)
+async def insert_baseline(size):
+    values = item_values('insert', size)
+
+    async def run():
+        for x in values:
+            await FoxOrm.db.execute(item_table.insert(), x)
+
+    return run
+
+
+@scenario('insert', FOX_ORM)
+async def insert_fox_orm(size):
+    items = [Item(**x) for x in item_values('insert', size)]
+
+    async def run():
+        for x in items:
+            await x.save()
+
+    return run
+
+
+@scenario('insert_bulk', BASELINE)
+async def insert_bulk_baseline(size):
+    values = item_values('insert_bulk', size)
+
+    async def run():
+        await FoxOrm.db.execute_many(item_table.insert(), values)
+
+    return run
+
+
+@scenario('insert_bulk', FOX_ORM)
+async def insert_bulk_fox_orm(size):
+    items = [Item(**x) for x in item_values('insert_bulk', size)]
+
+    async def run():
+        await Item.insert_many(items)
+
+    return run
+
+
+def next_value() -> int:
+    # Saving equal values doesn't write anything, so every run uses new values
+    global _value  # pylint: disable=global-statement
+    _value += 1
+    return _value
+
+
+_value = 0
+
+
+@scenario('update', BASELINE)
+async def update_baseline(size):
+    ids = await seed('update', size)
+    value = next_value()
+
+    async def run():
+        for pkey in ids:
+            await FoxOrm.db.execute(UPDATE_QUERY, {'pkey': pkey, 'n': value})
+
+    return run
+
+
+@scenario('update', FOX_ORM)
+async def update_fox_orm(size):
+    await seed('update', size)
+    items = await Item.select_all(seeded_where('update', size))
+    value = next_value()
+    for x in items:
+        x.n = value
+
+    async def run():
+        for x in items:
+            await x.save()
+
+    return run
+
+
+@scenario('update_bulk', BASELINE)
+async def update_bulk_baseline(size):
+    ids = await seed('update_bulk', size)
+    value = next_value()
+    values = [{'pkey': pkey, 'n': value} for pkey in ids]
+
+    async def run():
+        await FoxOrm.db.execute_many(UPDATE_QUERY, values)
+
+    return run
+
+
+@scenario('update_bulk', FOX_ORM)
+async def update_bulk_fox_orm(size):
+    await seed('update_bulk', size)
+    items = await Item.select_all(seeded_where('update_bulk', size))
+    value = next_value()
+    for x in items:
+        x.n = value
+
+    async def run():
+        await Item.save_all(items)
+
+    return run
+
+
+@scenario('get', BASELINE)
+async def get_baseline(size):
+    ids = await seed('get', size)
+
+    async def run():
+        for pkey in ids:
+            await FoxOrm.db.fetch_one(GET_QUERY, {'pkey': pkey})
+
+    return run
+
+
+@scenario('get', FOX_ORM)
+async def get_fox_orm(size):
+    ids = await seed('get', size)
+
+    async def run():
+        for pkey in ids:
+            await Item.get(pkey)
+
+    return run
+
+
+@scenario('select_all', BASELINE)
+async def select_all_baseline(size):
+    await seed('select', size)
+    query = item_table.select().where(seeded_where('select', size))
+
+    async def run():
+        await FoxOrm.db.fetch_all(query)
+
+    return run
+
+
+@scenario('select_all', FOX_ORM)
+async def select_all_fox_orm(size):
+    await seed('select', size)
+
+    async def run():
+        await Item.select_all(seeded_where('select', size))
+
+    return run
+
+
+@scenario('select_all', 'fox_orm_skip_parsing')
+async def select_all_skip_parsing(size):
+    await seed('select', size)
+
+    async def run():
+        await Item.select_all(seeded_where('select', size), skip_parsing=True)
+
+    return run
+
+
+@scenario('select_all', 'fox_orm_parse_obj')
+async def select_all_parse_obj(size):
+    # Select without the hydrator, shows its gain over pydantic validation
+    await seed('select', size)
+    query = item_table.select().where(seeded_where('select', size))
+
+    async def run():
+        for x in await FoxOrm.db.fetch_all(query):
+            Item.parse_obj(x._mapping)
+
+    return run
+
+
+@scenario('relation_fetch', BASELINE)
+async def relation_fetch_baseline(size):
+    group_id = await seed_group(size)
+    query = (
+        item_table.select()
+        .select_from(
+            item_table.join(group_item, group_item.c.item_id == item_table.c.pkey)
+        )
+        .where(group_item.c.group_id == group_id)
+    )
+
+    async def run():
+        await FoxOrm.db.fetch_all(query)
+
+    return run
+
+
+@scenario('relation_fetch', FOX_ORM)
+async def relation_fetch_fox_orm(size):
+    group = await Group.get(await seed_group(size))
+
+    async def run():
+        await group.items.fetch()
+
+    return run
+
+
+@scenario('relation_save', BASELINE)
+async def relation_save_baseline(size):
+    ids = await seed('relation_save', size)
+    group = await Group(name='relation_save').save()
+    values = [{'group_id': group.pkey, 'item_id': x} for x in ids]
+
+    async def run():
+        await FoxOrm.db.execute_many(group_item.insert(), values)
+
+    return run
+
+
+@scenario('relation_save', FOX_ORM)
+async def relation_save_fox_orm(size):
+    await seed('relation_save', size)
+    items = await Item.select_all(seeded_where('relation_save', size))
+    group = await Group(name='relation_save').save()
+
+    async def run():
+        for x in items:
+            group.items.add(x)
+        await group.items.save()
+
+    return run
+
+
+@scenario('serialize', BASELINE)
+async def serialize_baseline(size):
+    await seed('serialize', size)
+    rows = await FoxOrm.db.fetch_all(
+        item_table.select().where(seeded_where('serialize', size))
+    )
+
+    async def run():
+        for x in rows:
+            json.dumps(dict(x._mapping))
+
+    return run
+
+
+@scenario('serialize', FOX_ORM)
+async def serialize_fox_orm(size):
+    await seed('serialize', size)
+    items = await Item.select_all(seeded_where('serialize', size))
+
+    async def run():
+        for x in items:
+            x.json()
+
+    return run
+
+
+@scenario('class_attribute_lookup', BASELINE)
+async def class_attribute_lookup_baseline(size):
+    async def run():
+        for _ in range(size):
+            item_table.c.text  # pylint: disable=pointless-statement
+
+    return run
+
+
+@scenario('class_attribute_lookup', 'fox_orm_column')
+async def class_attribute_lookup_column(size):
+    async def run():
+        for _ in range(size):
+            Item.text  # pylint: disable=pointless-statement
+
+    return run
+
+
+@scenario('class_attribute_lookup', 'fox_orm_relation')
+async def class_attribute_lookup_relation(size):
+    async def run():
+        for _ in range(size):
+            Group.items  # pylint: disable=pointless-statement
+
+    return run
+
+
+@scenario('class_attribute_lookup', 'fox_orm_method')
+async def class_attribute_lookup_method(size):
+    async def run():
+        for _ in range(size):
+            Item.get  # pylint: disable=pointless-statement
+
+    return run
+
+
+CLASS_ANNOTATIONS = {
+    'pkey': Optional[int],
+    'text': str,
+    'n': int,
+    'data': dict,
+    'created_at': Optional[datetime],
+}
+
+
+@scenario('class_creation', BASELINE)
+async def class_creation_baseline(size):
+    metadata = MetaData()
+
+    async def run():
+        # Pydantic model and SQLAlchemy table, which are created by OrmModel
+        for i in range(size):
+            type(BaseModel)(
+                f'Model{i}',
+                (BaseModel,),
+                {'__annotations__': CLASS_ANNOTATIONS, '__module__': __name__},
+            )
+            Table(
+                f'model{i}',
+                metadata,
+                Column('pkey', Integer, primary_key=True),
+                Column('text', String, nullable=False),
+                Column('n', Integer, nullable=False),
+                Column('data', JSON, nullable=False),
+                Column('created_at', DateTime),
+            )
+
+    return run
+
+
+@scenario('class_creation', FOX_ORM)
+async def class_creation_fox_orm(size):
+    metadata = MetaData()
+
+    async def run():
+        for i in range(size):
+            type(OrmModel)(
+                f'Model{i}',
+                (OrmModel,),
+                {
+                    '__annotations__': CLASS_ANNOTATIONS,
+                    '__module__': __name__,
+                    '__metadata__': metadata,
+                    'pkey': pk,
+                },
+            )
+
+    return run
@@ -0,0 +1,149 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+from typing import List
+
+from benchmarks.runner import summarize
+
+MODULE_NAME = 'generated_models'
+
+HEADER = '''from datetime import datetime
+from typing import Optional, List
+
+from pydantic import BaseModel
+
+from fox_orm import FoxOrm, OrmModel
+from fox_orm.fields import pk, fkey, index, null, int64
+from fox_orm.relations import ManyToMany, OneToMany
+
+
+class Settings(BaseModel):
+    enabled: bool
+    tags: List[str]
+'''
+
+MODEL = '''
+
+class Model{i}(OrmModel):
+    pkey: Optional[int] = pk
+    name: str = index
+    value: int
+    big_value: int64
+    ratio: Optional[float]
+    created_at: datetime
+    comment: Optional[str] = null
+    data: dict
+    settings: Optional[Settings]
+'''
+
+FKEY = '''    parent_id: Optional[int] = fkey('model{parent}.pkey')
+'''
+
+O2M = '''    children: OneToMany['Model{child}'] = OneToMany(
+        to='{module}.Model{child}', key='parent_id'
+    )
+'''
+
+M2M = '''    links: ManyToMany['Model{other}'] = ManyToMany(
+        to='{module}.Model{other}', via='link_{i}_{other}'
+    )
+'''
+
+FOOTER = '''
+
+FoxOrm.init_relations()
+'''
+
+# Executed in a new interpreter, prints import times in seconds
+MEASURE = f'''
+import json
+import time
+
+start = time.perf_counter()
+import fox_orm
+fox_orm_end = time.perf_counter()
+import {MODULE_NAME}
+end = time.perf_counter()
+print(json.dumps({{'fox_orm': fox_orm_end - start, 'models': end - fox_orm_end}}))
+'''
+
+
+def generate_models(count: int) -> str:
+    """
+    Returns source of module with count models, where every model
+    references the previous one, every 10th model has one-to-many relation
+    and every 25th model has many-to-many relation
+    """
+    parts = [HEADER]
+    for i in range(count):
+        parts.append(MODEL.format(i=i))
+        if i > 0:
+            parts.append(FKEY.format(parent=i - 1))
+        if i % 10 == 0 and i + 1 < count:
+            parts.append(O2M.format(child=i + 1, module=MODULE_NAME))
+        if i % 25 == 0 and i + 2 < count:
+            parts.append(M2M.format(i=i, other=i + 2, module=MODULE_NAME))
+    parts.append(FOOTER)
+    return ''.join(parts)
+
+
+def measure_once(directory: str) -> dict:
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join(
+        [directory, root] + ([env['PYTHONPATH']] if env.get('PYTHONPATH') else [])
+    )
+    res = subprocess.run(
+        [sys.executable, '-c', MEASURE],
+        env=env,
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(res.stdout)
+
+
+def run(count: int, repeat: int, warmup: int) -> dict:
+    with tempfile.TemporaryDirectory() as directory:
+        with open(
+            os.path.join(directory, f'{MODULE_NAME}.py'), 'w', encoding='utf-8'
+        ) as f:
+            f.write(generate_models(count))
+        # Warmup runs also write bytecode cache of generated module
+        runs = [measure_once(directory) for _ in range(warmup + repeat)][warmup:]
+    results = {}
+    for key in ['fox_orm', 'models']:
+        timings: List[float] = [x[key] for x in runs]
+        results[key] = summarize(timings, 1 if key == 'fox_orm' else count)
+        results[key]['timings'] = timings
+    return {'models': count, 'repeat': repeat, 'results': results}
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.startup',
+        description='Measures time of importing fox_orm and a module '
+        'with generated models in a new interpreter',
+    )
+    parser.add_argument('-m', '--models', type=int, default=500)
+    parser.add_argument('-r', '--repeat', type=int, default=10)
+    parser.add_argument('-w', '--warmup', type=int, default=1)
+    parser.add_argument('-o', '--output', help='write results to JSON file')
+    args = parser.parse_args()
+    report = run(args.models, args.repeat, args.warmup)
+    for key, result in report['results'].items():
+        print(
+            f'{key:<10}median {result["median"] * 1000:>10.3f} ms  '
+            f'p95 {result["p95"] * 1000:>10.3f} ms'
+        )
+    print(f'per model {report["results"]["models"]["median_per_item"] * 1000:.3f} ms')
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
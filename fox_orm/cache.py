@@ -0,0 +1,71 @@
+from collections import OrderedDict
+from time import monotonic
+from typing import Any, Hashable, Optional, Tuple, Union
+
+from sqlalchemy.sql import ClauseElement
+
+
+class CacheConfig:
+    ttl: Optional[float]
+    max_entries: int
+
+    def __init__(self, ttl: Optional[float] = None, max_entries: int = 1000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+
+
+class QueryCache:
+    config: CacheConfig
+    hits: int
+    misses: int
+    # Incremented on every invalidation, used to drop results
+    # of queries, which were started before invalidation
+    generation: int
+    _entries: 'OrderedDict[Hashable, Tuple[Optional[float], Any]]'
+
+    def __init__(self, config: CacheConfig):
+        self.config = config
+        self.hits = 0
+        self.misses = 0
+        self.generation = 0
+        self._entries = OrderedDict()
+
+    @staticmethod
+    def make_key(
+        method: str, query: Union[ClauseElement, str], values: Optional[dict]
+    ) -> Hashable:
+        if isinstance(query, str):
+            return method, query, repr(values)
+        compiled = query.compile()
+        return method, str(compiled), repr(compiled.params), repr(values)
+
+    def get(self, key: Hashable) -> Tuple[bool, Any]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at is None or expires_at > monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._entries[key]
+        self.misses += 1
+        return False, None
+
+    def set(self, key: Hashable, value: Any, generation: int) -> None:
+        if generation != self.generation:
+            return
+        ttl = self.config.ttl
+        self._entries[key] = (None if ttl is None else monotonic() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.config.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self) -> None:
+        self.generation += 1
+        self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+__all__ = ['CacheConfig', 'QueryCache']
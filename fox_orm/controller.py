@@ -1,42 +1,173 @@
 from collections import defaultdict
-from typing import TYPE_CHECKING
+from contextlib import AsyncExitStack, asynccontextmanager, contextmanager
+from typing import TYPE_CHECKING, Optional, List
 
 from databases import Database
 from sqlalchemy import MetaData, Table, Column, Integer, ForeignKey
 
-from fox_orm.exceptions import AlreadyInitializedException
+from fox_orm.events import Events, QueryEvent
+from fox_orm.exceptions import AlreadyInitializedException, OrmException
+from fox_orm.internal.registry import DatabaseEntry, DEFAULT_DATABASE, current_shard
+from fox_orm.internal.replicas import ReplicaPool, ROUND_ROBIN, force_primary
+from fox_orm.internal.session import Session, current_session
+from fox_orm.internal.statements import StatementCache
+from fox_orm.internal.unit_of_work import UnitOfWork, current_unit_of_work
 
 if TYPE_CHECKING:
     from fox_orm.relations import _GenericIterableRelation
-    from typing import Union, Dict, Type, List, Tuple
+    from typing import Union, Dict, Type, List, Tuple, Callable
     from fox_orm.model import OrmModel
 
 
 class _FoxOrmMeta(type):
-    _db = None
+    _databases: 'Dict[str, DatabaseEntry]'
+    _events: Events
+    _metadata_databases: 'Dict[MetaData, str]'
     _assoc_tables: 'Dict[MetaData, Dict[str, Table]]'
     _lazyinit_relations: 'Dict[MetaData, List[Tuple[_GenericIterableRelation, Type[OrmModel]]]]'
 
     def __init__(cls, *args):
         super().__init__(*args)
         cls.metadata = MetaData()
+        cls._databases = {}
+        cls._events = Events()
+        cls._metadata_databases = {}
         cls._assoc_tables = defaultdict(dict)
         cls._lazyinit_relations = defaultdict(list)
 
-    def init(cls, db_uri, **options):
-        if cls._db is not None:
+    # pylint: disable=too-many-arguments
+    def init(
+        cls,
+        db_uri: Optional[str] = None,
+        replicas: Optional[List[str]] = None,
+        replica_selection: str = ROUND_ROBIN,
+        *,
+        name: str = DEFAULT_DATABASE,
+        uri: Optional[str] = None,
+        **options,
+    ):
+        if name in cls._databases:
             raise AlreadyInitializedException()
-        cls._db = Database(db_uri, **options)
+        db_uri = db_uri or uri
+        if db_uri is None:
+            raise OrmException('Database uri is not specified')
+        cls._databases[name] = DatabaseEntry(
+            name, db_uri, replicas, replica_selection, **options
+        )
+
+    def database(cls, name: str = DEFAULT_DATABASE) -> DatabaseEntry:
+        try:
+            return cls._databases[name]
+        except KeyError:
+            raise OrmException(f'Database {name} is not initialized') from None
+
+    def bind_metadata(cls, metadata: MetaData, name: str) -> None:
+        """
+        Binds models using given metadata to the named database
+        """
+        cls._metadata_databases[metadata] = name
+
+    def metadata_database(cls, metadata: MetaData) -> str:
+        return cls._metadata_databases.get(metadata, DEFAULT_DATABASE)
+
+    @contextmanager
+    def shard(cls, name: str):
+        """
+        Operations on sharded models, which don't specify primary key,
+        are executed on given database
+        """
+        token = current_shard.set(name)
+        try:
+            yield
+        finally:
+            current_shard.reset(token)
+
+    @property
+    def events(cls) -> Events:
+        return cls._events
+
+    def on(cls, event: str, handler: 'Callable[[QueryEvent], None]') -> None:
+        """
+        Registers handler of before_query, after_query or after_hydrate event
+        """
+        cls._events.on(event, handler)
+
+    def off(cls, event: str, handler: 'Callable[[QueryEvent], None]') -> None:
+        cls._events.off(event, handler)
+
+    @property
+    def db(cls) -> Database:
+        return cls.database().db
+
+    @property
+    def replicas(cls) -> Optional[ReplicaPool]:
+        return cls.database().replicas
+
+    @property
+    def dialect(cls) -> str:
+        return cls.database().dialect
 
     @property
-    def db(cls):
-        return cls._db
+    def statement_cache(cls) -> StatementCache:
+        return cls.database().statement_cache
 
     async def connect(cls):
-        await cls.db.connect()  # pylint: disable=no-member
+        for database in cls._databases.values():
+            await database.connect()
 
     async def disconnect(cls):
-        await cls.db.disconnect()  # pylint: disable=no-member
+        for database in cls._databases.values():
+            await database.disconnect()
+
+    def transaction(cls):
+        """
+        Transaction on the default primary database. Unlike db.transaction(),
+        also sends reads inside the transaction to the primary database
+        """
+        return cls.database().transaction()
+
+    async def read(cls, method: str, query, values: dict = None):
+        """
+        Executes fetch_one, fetch_all or fetch_val on a replica
+        of the default database if possible, otherwise on the primary database
+        """
+        return await cls.database().read(method, query, values)
+
+    def read_db(cls):
+        return cls.database().read_db()
+
+    @contextmanager
+    def use_primary(cls):
+        token = force_primary.set(True)
+        try:
+            yield
+        finally:
+            force_primary.reset(token)
+
+    @asynccontextmanager
+    async def session(cls):
+        session = Session()
+        token = current_session.set(session)
+        try:
+            yield session
+        finally:
+            current_session.reset(token)
+
+    @asynccontextmanager
+    async def unit_of_work(cls):
+        unit_of_work = UnitOfWork()
+        token = current_unit_of_work.set(unit_of_work)
+        try:
+            yield unit_of_work
+        finally:
+            current_unit_of_work.reset(token)
+        # Not reached if exception was raised, so changes are discarded
+        async with AsyncExitStack() as stack:
+            # Objects can be stored in different databases, transactions
+            # are committed one by one when all changes are written
+            for database in unit_of_work.databases():
+                await stack.enter_async_context(database.transaction())
+            await unit_of_work.flush()
 
     def get_assoc_table(
         cls,
@@ -90,6 +221,10 @@ class _FoxOrmMeta(type):
 
 class FoxOrm(metaclass=_FoxOrmMeta):
     db: Database
+    events: Events
+    replicas: Optional[ReplicaPool]
+    dialect: str
+    statement_cache: StatementCache
     metadata: MetaData
 
 
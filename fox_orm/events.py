@@ -0,0 +1,354 @@
+import json
+import os
+import time
+from typing import (
+    Any,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Dict,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TYPE_CHECKING,
+)
+
+from sqlalchemy.engine import Dialect
+
+from fox_orm.exceptions import OrmException
+
+if TYPE_CHECKING:
+    from fox_orm.model import OrmModel
+
+BEFORE_QUERY = 'before_query'
+AFTER_QUERY = 'after_query'
+AFTER_HYDRATE = 'after_hydrate'
+
+EVENT_NAMES = (BEFORE_QUERY, AFTER_QUERY, AFTER_HYDRATE)
+
+
+class QueryEvent:
+    """
+    Passed to all handlers of one query, so after_query and after_hydrate
+    handlers receive the same object with more fields filled
+    """
+
+    __slots__ = (
+        'model',
+        'operation',
+        'database',
+        'dialect',
+        'sql',
+        'param_count',
+        'row_count',
+        'db_time',
+        'hydration_time',
+        'start_time_ns',
+        'error',
+    )
+
+    model: 'Type[OrmModel]'
+    operation: str
+    database: str
+    dialect: str
+    sql: str
+    param_count: int
+    # None if unknown, for example for inserts and updates
+    row_count: Optional[int]
+    # Seconds spent waiting for the database
+    db_time: Optional[float]
+    # Seconds spent converting rows to model instances
+    hydration_time: Optional[float]
+    start_time_ns: int
+    error: Optional[BaseException]
+
+    def __init__(
+        self,
+        model: 'Type[OrmModel]',
+        operation: str,
+        database: str,
+        dialect: str,
+        sql: str,
+        param_count: int,
+    ):
+        self.model = model
+        self.operation = operation
+        self.database = database
+        self.dialect = dialect
+        self.sql = sql
+        self.param_count = param_count
+        self.row_count = None
+        self.db_time = None
+        self.hydration_time = None
+        self.start_time_ns = time.time_ns()
+        self.error = None
+
+    def __repr__(self):
+        return (
+            f'QueryEvent(model={self.model.__name__}, operation={self.operation!r}, '
+            f'row_count={self.row_count}, db_time={self.db_time}, '
+            f'hydration_time={self.hydration_time})'
+        )
+
+
+def _count_params(params: Any) -> int:
+    if params is None:
+        return 0
+    if isinstance(params, list):
+        return sum(_count_params(x) for x in params)
+    # Expanding IN parameters contain lists of values
+    return sum(len(x) if isinstance(x, (list, tuple)) else 1 for x in params.values())
+
+
+def describe_query(dialect: Dialect, query, values) -> Tuple[str, int]:
+    """
+    Returns SQL and number of parameters of the query
+    """
+    if isinstance(query, str):
+        return query, _count_params(values)
+    compiled = query.compile(dialect=dialect)
+    params = dict(compiled.params)
+    if isinstance(values, dict):
+        params.update(values)
+    elif isinstance(values, list):
+        return str(compiled), _count_params(values)
+    return str(compiled), _count_params(params)
+
+
+def _row_count(result: Any) -> int:
+    if isinstance(result, list):
+        return len(result)
+    return 0 if result is None else 1
+
+
+class Events:
+    # True if at least one handler is registered, checked before
+    # doing any work, so events cost nothing when they are not used
+    active: bool
+    _handlers: Dict[str, List[Callable[[QueryEvent], None]]]
+
+    def __init__(self):
+        self._handlers = {x: [] for x in EVENT_NAMES}
+        self.active = False
+
+    def _check_event(self, event: str) -> None:
+        if event not in self._handlers:
+            raise OrmException(f'Unknown event {event}')
+
+    def on(self, event: str, handler: Callable[[QueryEvent], None]) -> None:
+        self._check_event(event)
+        self._handlers[event].append(handler)
+        self.active = True
+
+    def off(self, event: str, handler: Callable[[QueryEvent], None]) -> None:
+        self._check_event(event)
+        if handler in self._handlers[event]:
+            self._handlers[event].remove(handler)
+        self.active = any(self._handlers.values())
+
+    def emit(self, event: str, query_event: QueryEvent) -> None:
+        for handler in self._handlers[event]:
+            handler(query_event)
+
+    # pylint: disable=too-many-arguments
+    def start(
+        self, model: 'Type[OrmModel]', operation: str, database: Any, query, values
+    ) -> QueryEvent:
+        sql, param_count = describe_query(
+            database.statement_cache.dialect, query, values
+        )
+        event = QueryEvent(
+            model, operation, database.name, database.dialect, sql, param_count
+        )
+        self.emit(BEFORE_QUERY, event)
+        return event
+
+    def finish(
+        self,
+        event: QueryEvent,
+        db_time: float,
+        row_count: Optional[int],
+        error: Optional[BaseException] = None,
+    ) -> None:
+        event.db_time = db_time
+        event.row_count = row_count
+        event.error = error
+        self.emit(AFTER_QUERY, event)
+
+    def finish_hydration(self, event: QueryEvent, hydration_time: float) -> None:
+        event.hydration_time = hydration_time
+        self.emit(AFTER_HYDRATE, event)
+
+    # pylint: disable=too-many-arguments
+    async def run(
+        self,
+        model: 'Type[OrmModel]',
+        operation: str,
+        database: Any,
+        query,
+        values,
+        call: Callable[[], Awaitable[Any]],
+        count_rows: bool = True,
+    ) -> Tuple[Any, QueryEvent]:
+        event = self.start(model, operation, database, query, values)
+        start = time.perf_counter()
+        try:
+            result = await call()
+        except BaseException as e:
+            self.finish(event, time.perf_counter() - start, None, e)
+            raise
+        self.finish(
+            event,
+            time.perf_counter() - start,
+            _row_count(result) if count_rows else None,
+        )
+        return result, event
+
+    def hydrate(self, event: QueryEvent, hydrate: Callable[[Any], Any], rows: Any):
+        start = time.perf_counter()
+        result = hydrate(rows)
+        self.finish_hydration(event, time.perf_counter() - start)
+        return result
+
+    async def iterate(self, event: QueryEvent, rows: AsyncIterator) -> AsyncIterator:
+        """
+        Measures time spent waiting for rows, emits after_query
+        when iteration is finished
+        """
+        db_time = 0.0
+        row_count = 0
+        error = None
+        iterator = rows.__aiter__()
+        try:
+            while True:
+                start = time.perf_counter()
+                try:
+                    row = await iterator.__anext__()
+                except StopAsyncIteration:
+                    break
+                finally:
+                    db_time += time.perf_counter() - start
+                row_count += 1
+                yield row
+        except GeneratorExit:
+            raise
+        except BaseException as e:
+            error = e
+            raise
+        finally:
+            self.finish(event, db_time, row_count, error)
+
+
+# OpenTelemetry SpanKind.CLIENT
+_SPAN_KIND_CLIENT = 3
+# OpenTelemetry StatusCode.ERROR
+_STATUS_CODE_ERROR = 2
+
+
+def _attribute(key: str, value: Any) -> dict:
+    if isinstance(value, bool):
+        return {'key': key, 'value': {'boolValue': value}}
+    if isinstance(value, int):
+        # int64 values are encoded as strings in OTLP JSON
+        return {'key': key, 'value': {'intValue': str(value)}}
+    if isinstance(value, float):
+        return {'key': key, 'value': {'doubleValue': value}}
+    return {'key': key, 'value': {'stringValue': str(value)}}
+
+
+class SpanRecorder:
+    """
+    Records query events as spans, which can be exported to a file
+    in OpenTelemetry (OTLP) JSON format
+    """
+
+    service_name: str
+    events: List[QueryEvent]
+    _trace_id: str
+
+    def __init__(self, service_name: str = 'fox_orm'):
+        self.service_name = service_name
+        self.events = []
+        self._trace_id = os.urandom(16).hex()
+
+    def attach(self) -> None:
+        # pylint: disable=import-outside-toplevel
+        from fox_orm import FoxOrm
+
+        FoxOrm.on(AFTER_QUERY, self.record)
+
+    def detach(self) -> None:
+        # pylint: disable=import-outside-toplevel
+        from fox_orm import FoxOrm
+
+        FoxOrm.off(AFTER_QUERY, self.record)
+
+    def record(self, event: QueryEvent) -> None:
+        self.events.append(event)
+
+    def clear(self) -> None:
+        self.events.clear()
+
+    def _span(self, event: QueryEvent) -> dict:
+        duration = (event.db_time or 0) + (event.hydration_time or 0)
+        attributes = [
+            _attribute('db.system', event.dialect),
+            _attribute('db.name', event.database),
+            _attribute('db.statement', event.sql),
+            _attribute('db.operation', event.operation),
+            _attribute('fox_orm.model', event.model.__name__),
+            _attribute('fox_orm.param_count', event.param_count),
+        ]
+        if event.row_count is not None:
+            attributes.append(_attribute('fox_orm.row_count', event.row_count))
+        if event.db_time is not None:
+            attributes.append(_attribute('fox_orm.db_time', event.db_time))
+        if event.hydration_time is not None:
+            attributes.append(
+                _attribute('fox_orm.hydration_time', event.hydration_time)
+            )
+        span = {
+            'traceId': self._trace_id,
+            'spanId': os.urandom(8).hex(),
+            'name': f'{event.model.__name__}.{event.operation}',
+            'kind': _SPAN_KIND_CLIENT,
+            'startTimeUnixNano': str(event.start_time_ns),
+            'endTimeUnixNano': str(event.start_time_ns + int(duration * 1e9)),
+            'attributes': attributes,
+            'status': {},
+        }
+        if event.error is not None:
+            span['status'] = {'code': _STATUS_CODE_ERROR, 'message': repr(event.error)}
+        return span
+
+    def to_otlp(self) -> dict:
+        return {
+            'resourceSpans': [
+                {
+                    'resource': {
+                        'attributes': [_attribute('service.name', self.service_name)]
+                    },
+                    'scopeSpans': [
+                        {
+                            'scope': {'name': 'fox_orm'},
+                            'spans': [self._span(x) for x in self.events],
+                        }
+                    ],
+                }
+            ]
+        }
+
+    def export(self, path: str) -> None:
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_otlp(), f)
+
+
+__all__ = [
+    'BEFORE_QUERY',
+    'AFTER_QUERY',
+    'AFTER_HYDRATE',
+    'QueryEvent',
+    'Events',
+    'SpanRecorder',
+]
@@ -3,9 +3,14 @@ from typing import Any
 
 from pydantic import BaseModel
 from sqlalchemy import JSON, BigInteger, ForeignKey
-from sqlalchemy.dialects.postgresql import JSONB
 
-from fox_orm.internal.columns import FieldType, ColumnArgument, ColumnFlag
+from fox_orm.internal.columns import (
+    FieldType,
+    ColumnArgument,
+    ColumnFlag,
+    ColumnInfoFlag,
+    lazy_sql_type,
+)
 
 
 # noinspection PyPep8Naming
@@ -23,7 +28,14 @@ class json(FieldType):
 # noinspection PyPep8Naming
 # pylint: disable=invalid-name
 class jsonb(FieldType):
-    sql_type = JSONB(none_as_null=True)
+    # pylint: disable=no-method-argument
+    @lazy_sql_type
+    def sql_type():
+        # Postgres dialect is imported only if it is used
+        # pylint: disable=import-outside-toplevel
+        from sqlalchemy.dialects.postgresql import JSONB
+
+        return JSONB(none_as_null=True)
 
 
 # noinspection PyPep8Naming
@@ -63,6 +75,7 @@ pk = ColumnFlag('primary_key')
 autoincrement = ColumnFlag('autoincrement')
 unique = ColumnFlag('unique')
 index = ColumnFlag('index')
+deferred = ColumnInfoFlag('deferred')
 
 __all__ = [
     'int64',
@@ -75,4 +88,5 @@ __all__ = [
     'unique',
     'fkey',
     'index',
+    'deferred',
 ]
@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import Type
+from typing import Any, Callable, Type
 
 from fox_orm.internal.utils import NonInstantiable
 
@@ -8,6 +8,26 @@ class FieldType(NonInstantiable):
     sql_type: Type
 
 
+# noinspection PyPep8Naming
+# pylint: disable=invalid-name
+class lazy_sql_type:
+    """
+    FieldType.sql_type created on first access
+    """
+
+    def __init__(self, factory: Callable[[], Any]):
+        self.factory = factory
+        self.name = None
+
+    def __set_name__(self, owner, name):
+        self.name = name
+
+    def __get__(self, instance, owner):
+        value = self.factory()
+        setattr(owner, self.name, value)
+        return value
+
+
 class ColumnArgument(ABC):
     @abstractmethod
     def apply(self, args: list, kwargs: dict) -> None:
@@ -27,3 +47,16 @@ class ColumnFlag(ColumnArgument):
 
     def apply(self, args: list, kwargs: dict):
         kwargs[self.key] = not self.inverse
+
+
+class ColumnInfoFlag(ColumnFlag):
+    """
+    Flag stored in Column.info, which is used by the ORM itself
+    instead of being passed to the database
+    """
+
+    def __invert__(self):
+        return ColumnInfoFlag(self.key, not self.inverse)
+
+    def apply(self, args: list, kwargs: dict):
+        kwargs.setdefault('info', {})[self.key] = not self.inverse
@@ -0,0 +1,133 @@
+from datetime import datetime, date, time
+from typing import (
+    Type,
+    Optional,
+    Callable,
+    Mapping,
+    Tuple,
+    AbstractSet,
+    TYPE_CHECKING,
+)
+
+from pydantic import Extra
+from pydantic.fields import SHAPE_SINGLETON
+from pydantic.typing import ForwardRef
+
+from fox_orm.internal.const import EXCLUDE_KEYS
+
+if TYPE_CHECKING:
+    from fox_orm.model import OrmModel
+
+# Values of these exact types, returned by database driver,
+# are not changed by pydantic validation
+FAST_TYPES = (int, float, str, bool, datetime, date, time)
+
+HYDRATOR = Callable[[Mapping], Optional[Tuple[dict, set]]]
+
+
+def _has_str_transforms(config) -> bool:
+    return bool(
+        config.anystr_strip_whitespace
+        or config.anystr_lower
+        or getattr(config, 'anystr_upper', False)
+        or config.min_anystr_length
+        or config.max_anystr_length
+    )
+
+
+# pylint: disable=too-many-branches
+def build_hydrator(
+    model: Type['OrmModel'], columns: Optional[AbstractSet[str]] = None
+) -> Optional[HYDRATOR]:
+    """
+    Generates function, which converts database row to values and fields set
+    of the model the same way as validate_model does, skipping validation
+    of values, which already have proper type.
+    If columns are specified, other columns are not loaded, otherwise
+    deferred columns are loaded only if they are present in the row.
+    Returns None if model is not supported, and generated function returns
+    None if row is not valid, so caller should fall back to parse_obj
+    """
+    config = model.__config__
+    if (
+        model.__pre_root_validators__
+        or model.__post_root_validators__
+        or config.extra is not Extra.ignore
+        or config.validate_all
+    ):
+        return None
+    str_transforms = _has_str_transforms(config)
+
+    namespace = {'model': model}
+    lines = ['def hydrate(row):', '    values = {}', '    fields_set = set()']
+    for i, (name, field) in enumerate(model.__fields__.items()):
+        if field.type_.__class__ == ForwardRef or field.alt_alias:
+            return None
+        if not isinstance(field.type_, type):
+            return None
+        namespace[f'field_{i}'] = field
+        if name in EXCLUDE_KEYS and name != model.__pkey_name__:
+            namespace[f'default_{i}'] = field.default
+            lines.append(f'    values[{name!r}] = default_{i}')
+            continue
+        if columns is not None and name not in columns:
+            continue
+        validate = [
+            f'value, errors = field_{i}.validate('
+            f'value, values, loc={field.alias!r}, cls=model)',
+            'if errors is not None:',
+            '    return None',
+        ]
+        fast = (
+            field.type_ in FAST_TYPES
+            and field.shape == SHAPE_SINGLETON
+            and not field.sub_fields
+            and not field.class_validators
+            and not field.pre_validators
+            and not field.post_validators
+            and not (field.type_ is str and str_transforms)
+        )
+        if fast:
+            namespace[f'type_{i}'] = field.type_
+            validate = [
+                'if value is None:',
+                '    pass' if field.allow_none else '    return None',
+                f'elif value.__class__ is not type_{i}:',
+                *['    ' + x for x in validate],
+            ]
+        if not issubclass(field.type_, str):
+            validate = ['if value == \'null\':', '    value = None', *validate]
+
+        lines += [
+            '    try:',
+            f'        value = row[{field.alias!r}]',
+            '    except KeyError:',
+        ]
+        if columns is not None or name in model.__deferred__:
+            # Requested columns must be present in the row,
+            # and missing deferred columns are left unloaded
+            lines += [
+                '        return None' if columns is not None else '        pass',
+                '    else:',
+                f'        fields_set.add({name!r})',
+                *['        ' + x for x in validate],
+                f'        values[{name!r}] = value',
+            ]
+            continue
+        if field.required:
+            lines.append('        return None')
+        else:
+            lines.append(f'        value = field_{i}.get_default()')
+            if field.validate_always:
+                lines += ['        ' + x for x in validate]
+        lines += [
+            '    else:',
+            f'        fields_set.add({name!r})',
+            *['        ' + x for x in validate],
+            f'    values[{name!r}] = value',
+        ]
+    lines.append('    return values, fields_set')
+
+    # pylint: disable=exec-used
+    exec('\n'.join(lines), namespace)
+    return namespace['hydrate']
@@ -0,0 +1,134 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import List, Optional, Set, TYPE_CHECKING
+
+from databases import Database
+
+from fox_orm.internal.replicas import ReplicaPool, ROUND_ROBIN, force_primary
+from fox_orm.internal.statements import StatementCache
+
+try:
+    from databases.backends.sqlite import SQLiteBackend
+except ImportError:
+    # Class is only used in isinstance checking
+    class SQLiteBackend:
+        ...
+
+
+if TYPE_CHECKING:
+    from fox_orm.cache import QueryCache
+
+
+DEFAULT_DATABASE = 'default'
+
+# Set inside FoxOrm.shard()
+current_shard: ContextVar[Optional[str]] = ContextVar('current_shard', default=None)
+
+
+class DatabaseEntry:
+    """
+    Database registered in FoxOrm with its replicas and compiled statements
+    """
+
+    name: str
+    db: Database
+    replicas: Optional[ReplicaPool]
+    statement_cache: StatementCache
+    # Caches of models written inside the outermost transaction of the task
+    _pending_invalidations: 'ContextVar[Optional[Set[QueryCache]]]'
+
+    def __init__(
+        self,
+        name: str,
+        db_uri: str,
+        replicas: Optional[List[str]] = None,
+        replica_selection: str = ROUND_ROBIN,
+        **options,
+    ):
+        self.name = name
+        self.db = Database(db_uri, **options)
+        self.replicas = None
+        if replicas:
+            self.replicas = ReplicaPool(
+                [Database(x, **options) for x in replicas], replica_selection
+            )
+        # pylint: disable=protected-access
+        self.statement_cache = StatementCache(self.db._backend._dialect)
+        self._pending_invalidations = ContextVar(
+            f'pending_invalidations_{name}', default=None
+        )
+
+    @property
+    def dialect(self) -> str:
+        return self.db.url.dialect
+
+    @property
+    def is_sqlite(self) -> bool:
+        # pylint: disable=protected-access
+        return isinstance(self.db._backend, SQLiteBackend)
+
+    async def connect(self) -> None:
+        await self.db.connect()
+        if self.replicas is not None:
+            await self.replicas.connect()
+
+    async def disconnect(self) -> None:
+        await self.db.disconnect()
+        if self.replicas is not None:
+            await self.replicas.disconnect()
+
+    @asynccontextmanager
+    async def transaction(self):
+        token = force_primary.set(True)
+        outermost = self._pending_invalidations.get() is None
+        if outermost:
+            pending_token = self._pending_invalidations.set(set())
+        try:
+            async with self.db.transaction() as transaction:
+                yield transaction
+        finally:
+            if outermost:
+                pending = self._pending_invalidations.get()
+                self._pending_invalidations.reset(pending_token)
+                for cache in pending:
+                    cache.invalidate()
+            force_primary.reset(token)
+
+    def invalidate_cache(self, cache: 'QueryCache') -> None:
+        """
+        Clears cache after a write. Inside a transaction, the cache is cleared
+        again when the outermost transaction ends, because other tasks can
+        cache old rows until the changes are committed
+        """
+        cache.invalidate()
+        pending = self._pending_invalidations.get()
+        if pending is not None:
+            pending.add(cache)
+
+    def in_transaction(self) -> bool:
+        """
+        Returns True if the current task has an open transaction
+        """
+        # pylint: disable=protected-access
+        connection = self.db._connection_context.get(None)
+        return connection is not None and bool(connection._transaction_stack)
+
+    def _use_replica(self) -> bool:
+        if self.replicas is None or force_primary.get():
+            return False
+        # Reads inside a transaction must see its changes
+        return not self.in_transaction()
+
+    async def read(self, method: str, query, values: dict = None):
+        if not self._use_replica():
+            return await getattr(self.db, method)(query, values)
+        async with self.replicas.acquire() as db:
+            return await getattr(db, method)(query, values)
+
+    @asynccontextmanager
+    async def read_db(self):
+        if not self._use_replica():
+            yield self.db
+            return
+        async with self.replicas.acquire() as db:
+            yield db
@@ -0,0 +1,63 @@
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from typing import AsyncIterator, List
+
+from databases import Database
+
+from fox_orm.exceptions import OrmException
+
+ROUND_ROBIN = 'round_robin'
+LEAST_BUSY = 'least_busy'
+
+
+class ReplicaPool:
+    databases: List[Database]
+    strategy: str
+    # Number of queries currently executed on each replica
+    in_flight: List[int]
+    _next: int
+
+    def __init__(self, databases: List[Database], strategy: str = ROUND_ROBIN):
+        if not databases:
+            raise OrmException('At least one replica is required')
+        if strategy not in (ROUND_ROBIN, LEAST_BUSY):
+            raise OrmException(f'Unknown replica selection strategy {strategy}')
+        self.databases = databases
+        self.strategy = strategy
+        self.in_flight = [0] * len(databases)
+        self._next = 0
+
+    def _choose(self) -> int:
+        if self.strategy == LEAST_BUSY:
+            # Ties are resolved in round-robin order
+            count = len(self.databases)
+            start = self._next
+            i = min(
+                range(start, start + count), key=lambda x: self.in_flight[x % count]
+            )
+            i %= count
+        else:
+            i = self._next
+        self._next = (i + 1) % len(self.databases)
+        return i
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Database]:
+        i = self._choose()
+        self.in_flight[i] += 1
+        try:
+            yield self.databases[i]
+        finally:
+            self.in_flight[i] -= 1
+
+    async def connect(self) -> None:
+        for db in self.databases:
+            await db.connect()
+
+    async def disconnect(self) -> None:
+        for db in self.databases:
+            await db.disconnect()
+
+
+# Set inside FoxOrm.use_primary()
+force_primary: ContextVar[bool] = ContextVar('force_primary', default=False)
@@ -0,0 +1,30 @@
+from contextvars import ContextVar
+from typing import Dict, Tuple, Type, Any, Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from fox_orm.model import OrmModel
+
+
+class Session:
+    identity_map: 'Dict[Tuple[Type[OrmModel], Any], OrmModel]'
+
+    def __init__(self):
+        self.identity_map = {}
+
+    def get(self, model_cls: 'Type[OrmModel]', pkey: Any) -> 'Optional[OrmModel]':
+        return self.identity_map.get((model_cls, pkey))
+
+    def add(self, obj: 'OrmModel') -> None:
+        self.identity_map[(obj.__class__, obj.pkey_value)] = obj
+
+    def remove(self, obj: 'OrmModel') -> None:
+        self.identity_map.pop((obj.__class__, obj.pkey_value), None)
+
+    def remove_all(self, model_cls: 'Type[OrmModel]') -> None:
+        for key in [x for x in self.identity_map if x[0] is model_cls]:
+            del self.identity_map[key]
+
+
+current_session: ContextVar[Optional[Session]] = ContextVar(
+    'current_session', default=None
+)
@@ -0,0 +1,69 @@
+from typing import Callable, Dict, Hashable, Iterable, Optional
+
+from sqlalchemy import text, bindparam, column
+from sqlalchemy.engine import Dialect
+from sqlalchemy.sql import ClauseElement
+from sqlalchemy.sql.elements import TextClause
+
+
+def compile_statement(
+    dialect: Dialect,
+    statement: ClauseElement,
+    column_keys: Optional[Iterable[str]] = None,
+) -> TextClause:
+    """
+    Compiles statement to textual form, keeping bind parameter
+    and result column types, so databases only has to parse SQL string
+    and bind values on execution
+    """
+    compiled = statement.compile(
+        dialect=dialect,
+        column_keys=list(column_keys) if column_keys is not None else None,
+    )
+    res = text(compiled.string).bindparams(
+        *[bindparam(name, type_=x.type) for name, x in compiled.binds.items()]
+    )
+    # pylint: disable=protected-access
+    if compiled._result_columns:
+        res = res.columns(*[column(x[1], x[3]) for x in compiled._result_columns])
+    return res
+
+
+class StatementCache:
+    hits: int
+    misses: int
+    _dialect: Dialect
+    _statements: Dict[Hashable, TextClause]
+
+    def __init__(self, dialect: Dialect):
+        # Statements are compiled with named parameters, which can be
+        # parsed by text(), and compiled again by backend on execution
+        self._dialect = type(dialect)(paramstyle='named')
+        self.hits = 0
+        self.misses = 0
+        self._statements = {}
+
+    def get(
+        self,
+        key: Hashable,
+        build: Callable[[], ClauseElement],
+        column_keys: Optional[Iterable[str]] = None,
+    ) -> TextClause:
+        statement = self._statements.get(key)
+        if statement is not None:
+            self.hits += 1
+            return statement
+        self.misses += 1
+        statement = compile_statement(self._dialect, build(), column_keys)
+        self._statements[key] = statement
+        return statement
+
+    @property
+    def dialect(self) -> Dialect:
+        return self._dialect
+
+    def clear(self) -> None:
+        self._statements.clear()
+
+    def __len__(self):
+        return len(self._statements)
@@ -1,6 +1,6 @@
 import typing
 from types import FunctionType
-from typing import Type, Tuple
+from typing import Any, Dict, Type, Tuple
 
 from pydantic import BaseConfig
 from pydantic.fields import ModelField, FieldInfo, Field
@@ -13,16 +13,61 @@ from fox_orm.internal.columns import FieldType, ColumnArgument
 from fox_orm.internal.const import PY_SQL_TYPES_MAPPING
 
 
-def parse_type(type_: Type):
-    class Config(BaseConfig):
-        arbitrary_types_allowed = True
+class _ParseConfig(BaseConfig):
+    arbitrary_types_allowed = True
 
+
+# Models usually share a small set of annotations, and parsing each of them
+# requires creating a pydantic ModelField, so results are cached
+_parsed_types: Dict[Any, Tuple[Any, bool]] = {}
+_sql_types: Dict[Any, Any] = {}
+
+
+def _parse_type(type_: Type) -> Tuple[Any, bool]:
     parsed = ModelField(
-        name='', type_=type_, model_config=Config, class_validators=None
+        name='', type_=type_, model_config=_ParseConfig, class_validators=None
     )
     return parsed.outer_type_, parsed.required
 
 
+def parse_type(type_: Type) -> Tuple[Any, bool]:
+    try:
+        return _parsed_types[type_]
+    except KeyError:
+        res = _parsed_types[type_] = _parse_type(type_)
+        return res
+    except TypeError:
+        # Unhashable annotation
+        return _parse_type(type_)
+
+
+def _resolve_sql_type(parsed_type):
+    parsed_type = typing.get_origin(parsed_type) or parsed_type
+    if lenient_issubclass(parsed_type, FieldType):
+        # false positive
+        # pylint: disable=no-member
+        return parsed_type.sql_type
+    if parsed_type in PY_SQL_TYPES_MAPPING:
+        return PY_SQL_TYPES_MAPPING[parsed_type]
+    for k, v in PY_SQL_TYPES_MAPPING.items():
+        if lenient_issubclass(parsed_type, k):
+            return v
+    return None
+
+
+def resolve_sql_type(parsed_type):
+    """
+    Returns SQL type for python type or None if there is no matching type
+    """
+    try:
+        return _sql_types[parsed_type]
+    except KeyError:
+        res = _sql_types[parsed_type] = _resolve_sql_type(parsed_type)
+        return res
+    except TypeError:
+        return _resolve_sql_type(parsed_type)
+
+
 MISSING = object()
 
 
@@ -31,20 +76,8 @@ def construct_column(name, annotation, args) -> Tuple[Column, FieldInfo]:
     if not isinstance(args, tuple):
         args = (args,)
 
-    final_type = None
     parsed_type, required = parse_type(annotation)
-    parsed_type = typing.get_origin(parsed_type) or parsed_type
-    if lenient_issubclass(parsed_type, FieldType):
-        # false positive
-        # pylint: disable=no-member
-        final_type = parsed_type.sql_type
-    elif parsed_type in PY_SQL_TYPES_MAPPING:
-        final_type = PY_SQL_TYPES_MAPPING[parsed_type]
-    else:
-        for k, v in PY_SQL_TYPES_MAPPING.items():
-            if lenient_issubclass(parsed_type, k):
-                final_type = v
-                break
+    final_type = resolve_sql_type(parsed_type)
     column_args = []
     column_kwargs = {}
     if required:
@@ -0,0 +1,85 @@
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, List, Tuple, Optional, TYPE_CHECKING
+
+from sqlalchemy.sql.ddl import sort_tables
+
+if TYPE_CHECKING:
+    from fox_orm.internal.registry import DatabaseEntry
+    from fox_orm.model import OrmModel
+    from fox_orm.relations import _GenericIterableRelation
+
+
+class UnitOfWork:
+    # Keyed by id(), because models are not hashable
+    instances: 'Dict[int, OrmModel]'
+    relations: 'Dict[int, _GenericIterableRelation]'
+    # Objects added to relations before they or relation's model were inserted
+    pending_relation_objects: 'List[Tuple[_GenericIterableRelation, OrmModel]]'
+
+    def __init__(self):
+        self.instances = {}
+        self.relations = {}
+        self.pending_relation_objects = []
+
+    def add(self, obj: 'OrmModel') -> None:
+        self.instances[id(obj)] = obj
+
+    def discard(self, obj: 'OrmModel') -> None:
+        self.instances.pop(id(obj), None)
+
+    def add_relation(self, relation: '_GenericIterableRelation') -> None:
+        self.relations[id(relation)] = relation
+
+    def add_pending_relation_object(
+        self, relation: '_GenericIterableRelation', obj: 'OrmModel'
+    ) -> None:
+        self.add_relation(relation)
+        self.pending_relation_objects.append((relation, obj))
+
+    def databases(self) -> 'List[DatabaseEntry]':
+        """
+        Returns databases, which can be written by flush, ordered by name
+        """
+        databases = {}
+        # pylint: disable=protected-access
+        for obj in self.instances.values():
+            database = obj._database(obj.pkey_value)
+            databases[database.name] = database
+        for relation in self.relations.values():
+            database = relation._database()
+            databases[database.name] = database
+        return [databases[x] for x in sorted(databases)]
+
+    async def flush(self) -> None:
+        """
+        Saves all changes, should be called inside transactions
+        on all databases()
+        """
+        by_model = defaultdict(list)
+        for obj in self.instances.values():
+            # pylint: disable=protected-access
+            if not obj.__bound__ or obj._changed_fields():
+                by_model[obj.__class__].append(obj)
+        # Referenced tables are inserted first
+        order = {
+            table: i
+            for i, table in enumerate(sort_tables([x.__table__ for x in by_model]))
+        }
+        # pylint: disable=protected-access
+        for model in sorted(by_model, key=lambda x: order[x.__table__]):
+            await model.save_all(by_model[model])
+        # Ids of all objects are known at this point
+        for relation, obj in self.pending_relation_objects:
+            relation.add(obj)
+        for relation in self.relations.values():
+            if relation.__modified__:
+                await relation._save()
+        self.instances.clear()
+        self.relations.clear()
+        self.pending_relation_objects.clear()
+
+
+current_unit_of_work: ContextVar[Optional[UnitOfWork]] = ContextVar(
+    'current_unit_of_work', default=None
+)
@@ -1,11 +1,14 @@
 import importlib
 import re
-from typing import Type, Tuple, Optional, TYPE_CHECKING
+from typing import Any, Type, Tuple, Optional, TYPE_CHECKING
 
 from pydantic import ValidationError, Extra, ConfigError, ExtraError, MissingError
 from pydantic.error_wrappers import ErrorWrapper
 from pydantic.typing import ForwardRef
 from pydantic.utils import ROOT_KEY, GetterDict
+from sqlalchemy import Table, literal
+from sqlalchemy.sql import Insert
+from sqlalchemy.sql.elements import BindParameter, ColumnElement
 
 from fox_orm.internal.const import EXCLUDE_KEYS
 
@@ -27,6 +30,41 @@ def full_import(name):
     return mod
 
 
+def dialect_insert(dialect: str, table: Table) -> Optional[Insert]:
+    """
+    Returns insert construct supporting ON CONFLICT clause
+    or None if dialect does not support it
+    """
+    # pylint: disable=import-outside-toplevel
+    if dialect == 'sqlite':
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect in ('postgresql', 'postgres'):
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        return None
+    return insert(table)
+
+
+# databases' SQLite backend binds parameters by position, in order of their
+# definition in the statement. So expanding IN has to be the last parameter
+# of a statement and every occurrence of a value needs its own parameter.
+# Queries follow these rules using the helpers below
+
+
+def expanding_in(column: ColumnElement, values: list) -> ColumnElement:
+    """
+    IN condition, which has to be the last parameter of the statement
+    """
+    return column.in_(values)
+
+
+def positional_literal(value: Any, column: ColumnElement) -> BindParameter:
+    """
+    Parameter of value of column type for one occurrence of the value
+    """
+    return literal(value, column.type)
+
+
 class OptionalAwaitable:
     def __init__(self, func, *args, **kwargs):
         self.func = func
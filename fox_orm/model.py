@@ -1,6 +1,8 @@
 import asyncio
-import os
-import traceback
+import json
+import time
+from collections import defaultdict, namedtuple
+from contextvars import ContextVar
 from typing import (
     Union,
     Mapping,
@@ -11,33 +13,64 @@ from typing import (
     List,
     Type,
     Optional,
+    AbstractSet,
+    AsyncIterator,
+    FrozenSet,
+    Callable,
+    Iterable,
+    Set,
+    Tuple,
+    Awaitable,
 )
 
 from pydantic import BaseModel
+from pydantic.json import pydantic_encoder
 from pydantic.main import ModelMetaclass, UNTOUCHED_TYPES
-from sqlalchemy import select, func, Table, exists, MetaData, Column
-from sqlalchemy.sql import ClauseElement
-from sqlalchemy.sql.elements import ColumnElement
+from sqlalchemy import (
+    select,
+    func,
+    Table,
+    exists,
+    MetaData,
+    Column,
+    case,
+    cast,
+    literal,
+    bindparam,
+    JSON,
+    and_,
+    or_,
+)
+from sqlalchemy.sql import ClauseElement, Select
+from sqlalchemy.sql.elements import ColumnElement, Label
 
 from fox_orm import FoxOrm
+from fox_orm.cache import CacheConfig, QueryCache
 from fox_orm.exceptions import OrmException
 from fox_orm.internal.const import EXCLUDE_KEYS
+from fox_orm.internal.hydrator import build_hydrator, HYDRATOR
+from fox_orm.internal.registry import DatabaseEntry, current_shard
+from fox_orm.internal.replicas import force_primary
+from fox_orm.internal.session import current_session
+from fox_orm.internal.unit_of_work import current_unit_of_work
 from fox_orm.internal.table import construct_column
+from fox_orm.pagination import (
+    Page,
+    parse_order_by,
+    encode_cursor,
+    decode_cursor,
+    keyset_condition,
+)
 from fox_orm.internal.utils import (
     class_or_instancemethod,
     camel_to_snake,
     validate_model,
+    dialect_insert,
+    expanding_in,
+    positional_literal,
 )
 from fox_orm.relations import _GenericIterableRelation
 
-try:
-    from databases.backends.sqlite import SQLiteBackend
-except ImportError:
-    # Class is only used in isinstance checking
-    class SQLiteBackend:
-        ...
-
-
 if TYPE_CHECKING:
     # pylint: disable=no-name-in-module,ungrouped-imports
     from pydantic.typing import (
@@ -66,6 +99,127 @@ def is_valid_column_value(v: Any) -> bool:
     return not is_untouched or is_field_type
 
 
+# Set while pydantic builds a model class. Pydantic checks that field names
+# don't shadow base class attributes using getattr(base, field_name), which
+# must not return columns or relations
+_creating_class: ContextVar[bool] = ContextVar('_creating_class', default=False)
+
+
+# Value of _hydrator before hydrator is built
+_NOT_BUILT = object()
+
+_MISSING = object()
+
+# Functions, which can be applied to a column by Model.aggregate
+AGGREGATE_FUNCTIONS = frozenset({'sum', 'avg', 'min', 'max', 'count'})
+
+_aggregate_result_types: Dict[Tuple[str, ...], type] = {}
+
+
+def aggregate_result_type(names: Tuple[str, ...]) -> type:
+    # Creating namedtuple classes is slow, so they are reused
+    result_type = _aggregate_result_types.get(names)
+    if result_type is None:
+        if len(set(names)) != len(names):
+            raise OrmException(f'Duplicate result names {", ".join(names)}')
+        try:
+            result_type = namedtuple('AggregateResult', names)
+        except ValueError as e:
+            raise OrmException(str(e)) from e
+        _aggregate_result_types[names] = result_type
+    return result_type
+
+
+# Shared encoder, json.dumps with arguments creates new encoder on each call
+_snapshot_encoder = json.JSONEncoder(default=pydantic_encoder, check_circular=False)
+
+
+def _snapshot_value(value: Any) -> int:
+    # Hash of serialized value, so snapshots don't keep copies of large values
+    return hash(_snapshot_encoder.encode(value))
+
+
+def _split_by_pkey(instances: List[MODEL]) -> Tuple[List[MODEL], List[MODEL]]:
+    """
+    Splits objects to ones with and without primary key value. Rows in
+    multi-row insert must have the same set of columns, and primary key
+    is only inserted if it's set
+    """
+    with_pkey = [x for x in instances if x.pkey_value is not None]
+    without_pkey = [x for x in instances if x.pkey_value is None]
+    return with_pkey, without_pkey
+
+
+# Snapshot of a loaded object, which JSON columns were not accessed yet.
+# Hashes are taken on first access or assignment of a JSON column,
+# so objects which are only read don't serialize their values
+_PENDING_SNAPSHOT = object()
+
+
+class ColumnDescriptor:
+    __slots__ = ('column',)
+
+    def __init__(self, column: Column):
+        self.column = column
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            if _creating_class.get():
+                return None
+            return self.column
+        # Field values are stored in instance __dict__, which takes precedence
+        # over this descriptor, so we only get there if value is not loaded
+        raise AttributeError(
+            f'Column {self.column.name} is not loaded, use undefer() to load it'
+        )
+
+
+class JsonColumnDescriptor(ColumnDescriptor):
+    """
+    Data descriptor of JSON columns, which takes precedence over instance
+    __dict__ and takes pending snapshot before the value can be modified in place
+    """
+
+    __slots__ = ()
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return super().__get__(instance, owner)
+        try:
+            value = instance.__dict__[self.column.name]
+        except KeyError:
+            return super().__get__(instance, owner)
+        # Objects created by copy() don't have slots set
+        if getattr(instance, '__snapshot__', None) is _PENDING_SNAPSHOT:
+            instance._take_snapshot()
+        return value
+
+    def __set__(self, instance, value):
+        # Model __setattr__ writes values to __dict__ directly, this is only
+        # called by object.__setattr__
+        instance.__dict__[self.column.name] = value
+
+
+class RelationDescriptor:
+    __slots__ = ('name', 'relation')
+
+    def __init__(self, name: str, relation: _GenericIterableRelation):
+        self.name = name
+        self.relation = relation
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            if _creating_class.get():
+                return None
+            return self.relation
+        # Relation copies are created on first access and stored in instance
+        # __dict__, which takes precedence over this descriptor afterwards
+        # pylint: disable=protected-access
+        relation = self.relation._init_copy(instance)
+        instance.__dict__[self.name] = relation
+        return relation
+
+
 class OrmModelMeta(ModelMetaclass):
     if TYPE_CHECKING:
         __columns__: Dict[str, Column]
@@ -75,11 +229,32 @@ class OrmModelMeta(ModelMetaclass):
         __metadata__: MetaData
         __abstract__: bool
         __pkey_name__: str
+        __cache__: Optional[CacheConfig]
+        __query_cache__: Optional[QueryCache]
+        __deferred__: FrozenSet[str]
+        __json_columns__: FrozenSet[str]
+        __partial_hydrators__: Dict[FrozenSet[str], Optional[HYDRATOR]]
+        __database__: Optional[str]
+        __shard__: Optional[Callable[[Any], str]]
 
     @property
     def pkey_column(cls):
         return getattr(cls.__table__.c, cls.__pkey_name__)
 
+    # Compiling hydrator takes a significant part of class creation time,
+    # so it is built on first use
+    @property
+    def __hydrator__(cls) -> Optional[HYDRATOR]:
+        hydrator = cls.__dict__.get('_hydrator')
+        if hydrator is _NOT_BUILT:
+            hydrator = build_hydrator(cls)
+            type.__setattr__(cls, '_hydrator', hydrator)
+        return hydrator
+
+    @__hydrator__.setter
+    def __hydrator__(cls, value: Optional[HYDRATOR]):
+        type.__setattr__(cls, '_hydrator', value)
+
     @classmethod
     def _check_type(mcs, namespace: dict, key: str, expected_type: type):
         if key in namespace and not isinstance(namespace[key], expected_type):
@@ -96,6 +271,8 @@ class OrmModelMeta(ModelMetaclass):
         mcs._check_type(namespace, '__tablename__', str)
         mcs._check_type(namespace, '__metadata__', MetaData)
         mcs._check_type(namespace, '__abstract__', bool)
+        mcs._check_type(namespace, '__cache__', CacheConfig)
+        mcs._check_type(namespace, '__database__', str)
 
     def get_namespace(cls):
         namespace = {}
@@ -109,27 +286,23 @@ class OrmModelMeta(ModelMetaclass):
                 annotations[column_name] = annotation
         return namespace
 
-    def __getattribute__(cls, item):
-        caller = traceback.extract_stack()[-2]
-        if caller.name == 'validate_field_name' and caller.filename.endswith(
-            f'{os.sep}pydantic{os.sep}utils.py'
-        ):
-            return super().__getattribute__(item)
-
-        if item.startswith('_'):
-            return super().__getattribute__(item)
-
-        if item in cls.__columns__:
-            return getattr(cls.__table__.columns, item)
-        if item in cls.__relations__:
-            return cls.__relations__[item]
-
-        return super().__getattribute__(item)
-
     def __new__(mcs, name, bases, namespace, **kwargs):
         if bases[0] == BaseModel:
             return super().__new__(mcs, name, bases, namespace, **kwargs)
 
+        # Hack for generating FastAPI models. FastAPI clones response models
+        # using create_model(model.__name__, __base__=model), which, unlike
+        # a class statement, passes namespace without __qualname__
+        if (
+            len(bases) == 1
+            and issubclass((base := bases[0]), OrmModel)
+            and base is not OrmModel
+            and base.__name__ == name
+            and '__qualname__' not in namespace
+            and not namespace.get('__annotations__')
+        ):
+            return ModelMetaclass(name, (BaseModel,), base.get_namespace())
+
         inherited_columns = {}
         for base in bases[::-1]:
             if issubclass(base, OrmModel) and base is not OrmModel:
@@ -181,23 +354,16 @@ class OrmModelMeta(ModelMetaclass):
         all_columns = inherited_columns.copy()
         all_columns.update(columns)
 
-        # Hack for generating FastAPI models
-        if (
-            len(bases) == 1
-            and issubclass((base := bases[0]), OrmModel)
-            and base is not OrmModel
-            and base.__name__ == name
-        ):
-            stack = traceback.extract_stack()
-            if len(stack) >= 3:
-                caller = stack[-3]
-                if caller.name == 'create_cloned_field' and caller.filename.endswith(
-                    f'{os.sep}fastapi{os.sep}utils.py'
-                ):
-                    return ModelMetaclass(name, (BaseModel,), base.get_namespace())
-
         new_namespace['__abstract__'] = abstract
         new_namespace['__columns__'] = all_columns
+        new_namespace['__deferred__'] = frozenset(
+            x.name for x in all_columns.values() if x.info.get('deferred')
+        )
+        # Values of these columns can be modified in place,
+        # so changes are detected by comparing snapshots
+        new_namespace['__json_columns__'] = frozenset(
+            x.name for x in all_columns.values() if isinstance(x.type, JSON)
+        )
         if abstract:
             new_namespace['__pkey_name__'] = None
             new_namespace['__table__'] = None
@@ -214,9 +380,25 @@ class OrmModelMeta(ModelMetaclass):
             new_namespace['c'] = table.c
         new_namespace['__relations__'] = relation_namespace
 
-        cls = super().__new__(mcs, name, bases, new_namespace, **kwargs)
+        token = _creating_class.set(True)
+        try:
+            cls = super().__new__(mcs, name, bases, new_namespace, **kwargs)
+        finally:
+            _creating_class.reset(token)
+        cache_config = cls.__cache__
+        cls.__query_cache__ = QueryCache(cache_config) if cache_config else None
+        cls.__hydrator__ = None if abstract else _NOT_BUILT
+        cls.__partial_hydrators__ = {}
         if not abstract:
-            for rel in relation_namespace.values():
+            for column in cls.__table__.columns:
+                descriptor = (
+                    JsonColumnDescriptor
+                    if column.name in cls.__json_columns__
+                    else ColumnDescriptor
+                )
+                type.__setattr__(cls, column.name, descriptor(column))
+            for rel_name, rel in relation_namespace.items():
+                type.__setattr__(cls, rel_name, RelationDescriptor(rel_name, rel))
                 FoxOrm._lazyinit_relation(metadata, rel, cls)
         return cls
 
@@ -235,24 +417,39 @@ class OrmModel(BaseModel, metaclass=OrmModelMeta):
         __metadata__: MetaData
         __abstract__: bool
         __pkey_name__: str
+        __cache__: Optional[CacheConfig]
+        __query_cache__: Optional[QueryCache]
+        __hydrator__: Optional[HYDRATOR]
+        __deferred__: FrozenSet[str]
+        __json_columns__: FrozenSet[str]
+        __partial_hydrators__: Dict[FrozenSet[str], Optional[HYDRATOR]]
+        __database__: Optional[str]
+        __shard__: Optional[Callable[[Any], str]]
 
         # instance attrs
         __modified__: set
         __bound__: bool
+        # Hashes of JSON column values, which were last loaded or saved,
+        # or _PENDING_SNAPSHOT if they were not accessed since loading
+        __snapshot__: Optional[Dict[str, int]]
 
     __class_vars__ = {'c'}
 
-    __slots__ = ('__fields_set__', '__modified__', '__bound__')
+    __cache__ = None
+    __database__ = None
+    # Classmethod, returning name of the database for given primary key
+    __shard__ = None
+
+    __slots__ = ('__fields_set__', '__modified__', '__bound__', '__snapshot__')
 
     def __repr_args__(self) -> 'ReprArgs':
         exclude = EXCLUDE_KEYS | set(self.__relations__.keys())
         return [(k, v) for k, v in self.__dict__.items() if k not in exclude]
 
     def _init_private_attributes(self):
-        self.__modified__ = set()
-        self.__bound__ = False
-        for k, v in self.__relations__.items():  # pylint: disable=no-member
-            self.__dict__[k] = v._init_copy(self)  # pylint: disable=protected-access
+        object.__setattr__(self, '__modified__', set())
+        object.__setattr__(self, '__bound__', False)
+        object.__setattr__(self, '__snapshot__', None)
         super()._init_private_attributes()
 
     # noinspection PyMissingConstructor
@@ -265,6 +462,9 @@ class OrmModel(BaseModel, metaclass=OrmModelMeta):
         object.__setattr__(self, '__dict__', values)
         object.__setattr__(self, '__fields_set__', fields_set)
         self._init_private_attributes()
+        unit_of_work = current_unit_of_work.get()
+        if unit_of_work is not None:
+            unit_of_work.add(self)
 
     # pylint: disable=unsubscriptable-object, too-many-arguments
     def _iter(
@@ -277,7 +477,7 @@ class OrmModel(BaseModel, metaclass=OrmModelMeta):
         exclude_defaults: bool = False,
         exclude_none: bool = False,
     ) -> 'TupleGenerator':
-        exclude_private = EXCLUDE_KEYS
+        exclude_private = EXCLUDE_KEYS | self.__relations__.keys()
         if exclude is None:
             exclude = exclude_private
         elif isinstance(
@@ -316,11 +516,25 @@ class OrmModel(BaseModel, metaclass=OrmModelMeta):
             return super().__setattr__(name, value)
         if name in EXCLUDE_KEYS:
             return object.__setattr__(self, name, value)
-        if name not in self.__private_attributes__ and name in self.__fields__:
-            self.flag_modified(name)
         if name in self.__relations__:
             raise ValueError('Do not set relation field')
-        return super().__setattr__(name, value)
+        if name in self.__private_attributes__ or name not in self.__fields__:
+            return super().__setattr__(name, value)
+        if self.__snapshot__ is _PENDING_SNAPSHOT and name in self.__json_columns__:
+            self._take_snapshot()
+        old = self.__dict__.get(name, _MISSING)
+        super().__setattr__(name, value)
+        new = self.__dict__[name]
+        # Assigning an equal value doesn't modify the field. Changes
+        # of JSON columns are checked on save by comparing snapshots
+        if (
+            not self.__bound__
+            or name in self.__json_columns__
+            or type(old) is not type(new)
+            or old != new
+        ):
+            self.flag_modified(name)
+        return None
 
     # noinspection PyMethodOverriding
     # pylint: disable=arguments-differ
@@ -340,50 +554,474 @@ class OrmModel(BaseModel, metaclass=OrmModelMeta):
         m._init_private_attributes()  # pylint: disable=protected-access
         return m
 
+    @classmethod
+    def _construct_validated(cls: Type[MODEL], values: dict, fields_set: set) -> MODEL:
+        m = cls.__new__(cls)
+        object.__setattr__(m, '__dict__', values)
+        object.__setattr__(m, '__fields_set__', fields_set)
+        m._init_private_attributes()  # pylint: disable=protected-access
+        return m
+
+    @classmethod
+    def update_forward_refs(cls, **localns: Any) -> None:
+        super().update_forward_refs(**localns)
+        if not cls.__abstract__:
+            cls.__hydrator__ = _NOT_BUILT
+            cls.__partial_hydrators__ = {}
+
+    @classmethod
+    def _database(cls, pkey: Any = None) -> DatabaseEntry:
+        shard = cls.__shard__
+        if shard is None:
+            name = cls.__database__ or FoxOrm.metadata_database(cls.__table__.metadata)
+        elif pkey is not None:
+            name = shard(pkey)
+        else:
+            name = current_shard.get()
+            if name is None:
+                raise OrmException(
+                    'Database of sharded model can\'t be determined '
+                    'without primary key, use FoxOrm.shard()'
+                )
+        return FoxOrm.database(name)
+
     def flag_modified(self, attr):
         self.__modified__.add(attr)
+        unit_of_work = current_unit_of_work.get()
+        if unit_of_work is not None:
+            unit_of_work.add(self)
+
+    def _take_snapshot(self, fields: Optional[Iterable[str]] = None) -> None:
+        json_columns = self.__json_columns__
+        if not json_columns:
+            return
+        if fields is not None:
+            json_columns = json_columns.intersection(fields)
+        snapshot = self.__snapshot__
+        if snapshot is _PENDING_SNAPSHOT:
+            if fields is not None:
+                # Not accessed values are equal to the loaded ones
+                return
+            snapshot = None
+        if snapshot is None:
+            snapshot = {}
+            object.__setattr__(self, '__snapshot__', snapshot)
+        values = self.__dict__
+        for name in json_columns:
+            if name in values:
+                snapshot[name] = _snapshot_value(values[name])
+
+    def _changed_fields(self) -> Set[str]:
+        """
+        Returns fields, which values differ from values in the database
+        """
+        snapshot = self.__snapshot__
+        if snapshot is None or snapshot is _PENDING_SNAPSHOT:
+            return self.__modified__
+        changed = set(self.__modified__)
+        values = self.__dict__
+        for name, value_hash in snapshot.items():
+            if name in values and _snapshot_value(values[name]) != value_hash:
+                changed.add(name)
+            else:
+                changed.discard(name)
+        return changed
 
     def ensure_id(self):
         if not self.__bound__:
             raise OrmException('Object is not bound to db, execute insert first')
         assert getattr(self, self.__pkey_name__, None) is not None
 
+    def _insert_data(self) -> dict:
+        pkey_name = self.__pkey_name__
+        data = self.dict(exclude={pkey_name}, include=self.__fields__.keys())
+        if self.pkey_value is not None:
+            data[pkey_name] = self.pkey_value
+        return data
+
     # pylint: disable=access-member-before-definition
     async def save(self) -> MODEL:
+        unit_of_work = current_unit_of_work.get()
+        if unit_of_work is not None:
+            unit_of_work.add(self)
+            return self
         table = self.__table__
-        pkey_name = self.__pkey_name__
+        database = self._database(self.pkey_value)
         if self.__bound__:
             self.ensure_id()
-            if not self.__modified__:
+            changed = self._changed_fields()
+            if not changed:
+                self.__modified__.clear()
                 return self
-            fields = self.dict(include=self.__modified__)
+            fields = self.dict(include=changed)
+            query = database.statement_cache.get(
+                (self.__class__, 'update', frozenset(fields)),
+                lambda: table.update().where(self.pkey_column == bindparam('_pkey')),
+                fields,
+            )
             # pylint: disable=access-member-before-definition
-            await FoxOrm.db.execute(
-                table.update().where(self.pkey_column == self.pkey_value), fields
+            await self._execute(
+                database,
+                'save',
+                'execute',
+                query.bindparams(_pkey=self.pkey_value, **fields),
             )
+            self._invalidate_cache(database)
+            self._take_snapshot(changed)
             self.__modified__.clear()
         else:
-            data = self.dict(exclude={pkey_name}, include=self.__fields__.keys())
-            if self.pkey_value is not None:
-                data[pkey_name] = self.pkey_value
+            data = self._insert_data()
             # pylint: disable=attribute-defined-outside-init
-            if not isinstance(FoxOrm.db.connection()._backend, SQLiteBackend):
-                self.pkey_value = await FoxOrm.db.fetch_val(
-                    table.insert().returning(self.pkey_column), data
+            if not database.is_sqlite:
+                query = database.statement_cache.get(
+                    (self.__class__, 'insert', frozenset(data)),
+                    lambda: table.insert().returning(self.pkey_column),
+                    data,
+                )
+                self.pkey_value = await self._execute(
+                    database, 'save', 'fetch_val', query.bindparams(**data)
                 )
             else:
-                self.pkey_value = await FoxOrm.db.execute(table.insert().values(**data))
+                query = database.statement_cache.get(
+                    (self.__class__, 'insert', frozenset(data)),
+                    table.insert,
+                    data,
+                )
+                self.pkey_value = await self._execute(
+                    database, 'save', 'execute', query.bindparams(**data)
+                )
+            self._invalidate_cache(database)
             self.__bound__ = True
+            self._take_snapshot()
+            self.__modified__.clear()
+            session = current_session.get()
+            if session is not None:
+                session.add(self)
         return self
 
+    # pylint: disable=protected-access
+    @classmethod
+    async def insert_many(
+        cls: Type[MODEL], instances: List[MODEL], chunk_size: int = 500
+    ) -> List[MODEL]:
+        groups = defaultdict(list)
+        for instance in instances:
+            if instance.__bound__:
+                raise OrmException('Object is already bound to db')
+            groups[cls._database(instance.pkey_value)].append(instance)
+        for database, group in groups.items():
+            await cls._insert_many(database, group, chunk_size)
+            cls._invalidate_cache(database)
+        session = current_session.get()
+        for instance in instances:
+            instance.__bound__ = True
+            instance._take_snapshot()
+            instance.__modified__.clear()
+            if session is not None:
+                session.add(instance)
+        return instances
+
+    @classmethod
+    async def _insert_many(
+        cls, database: DatabaseEntry, instances: List[MODEL], chunk_size: int
+    ) -> None:
+        table = cls.__table__
+        with_pkey, without_pkey = _split_by_pkey(instances)
+        pkeys = []
+        async with database.transaction():
+            for i in range(0, len(with_pkey), chunk_size):
+                chunk = with_pkey[i : i + chunk_size]
+                await cls._execute(
+                    database,
+                    'insert_many',
+                    'execute',
+                    table.insert().values([x._insert_data() for x in chunk]),
+                )
+            for i in range(0, len(without_pkey), chunk_size):
+                chunk = without_pkey[i : i + chunk_size]
+                query = table.insert().values([x._insert_data() for x in chunk])
+                if not database.is_sqlite:
+                    pkeys.extend(
+                        x[cls.__pkey_name__]
+                        for x in await cls._execute(
+                            database,
+                            'insert_many',
+                            'fetch_all',
+                            query.returning(cls.pkey_column),
+                        )
+                    )
+                else:
+                    # SQLite assigns sequential rowids to rows of one statement
+                    last_id = await cls._execute(
+                        database, 'insert_many', 'execute', query
+                    )
+                    pkeys.extend(range(last_id - len(chunk) + 1, last_id + 1))
+        for instance, pkey in zip(without_pkey, pkeys):
+            instance.pkey_value = pkey
+
+    @classmethod
+    def _bulk_update_query(
+        cls, fields: AbstractSet[str], instances: List[MODEL], dialect: str
+    ):
+        table = cls.__table__
+        pkey_column = cls.pkey_column
+        data = [(x.pkey_value, x.dict(include=fields)) for x in instances]
+        values = {}
+        for field in fields:
+            column_type = table.c[field].type
+            value = case(
+                {pkey: literal(x[field], column_type) for pkey, x in data},
+                value=pkey_column,
+            )
+            # PostgreSQL infers text type for CASE with only untyped parameters.
+            # SQLite doesn't need the cast and would convert values to numbers
+            # when casting to types like JSON or DATETIME
+            if dialect != 'sqlite':
+                value = cast(value, column_type)
+            values[field] = value
+        return (
+            table.update()
+            .values(values)
+            .where(expanding_in(pkey_column, [pkey for pkey, _ in data]))
+        )
+
+    # pylint: disable=protected-access
+    @classmethod
+    async def save_all(
+        cls: Type[MODEL], instances: List[MODEL], chunk_size: int = 500
+    ) -> List[MODEL]:
+        unbound = defaultdict(list)
+        groups = defaultdict(lambda: defaultdict(list))
+        for instance in instances:
+            database = cls._database(instance.pkey_value)
+            if not instance.__bound__:
+                unbound[database].append(instance)
+                continue
+            changed = instance._changed_fields()
+            if changed:
+                instance.ensure_id()
+                groups[database][frozenset(changed)].append(instance)
+            else:
+                instance.__modified__.clear()
+        for database in unbound.keys() | groups.keys():
+            async with database.transaction():
+                if unbound[database]:
+                    await cls.insert_many(unbound[database], chunk_size)
+                for fields, group in groups[database].items():
+                    for i in range(0, len(group), chunk_size):
+                        await cls._execute(
+                            database,
+                            'save_all',
+                            'execute',
+                            cls._bulk_update_query(
+                                fields, group[i : i + chunk_size], database.dialect
+                            ),
+                        )
+            cls._invalidate_cache(database)
+        for database_groups in groups.values():
+            for fields, group in database_groups.items():
+                for instance in group:
+                    instance._take_snapshot(fields)
+                    instance.__modified__.clear()
+        return instances
+
+    @classmethod
+    def _check_upsert_columns(
+        cls, conflict_on: List[str], update: Optional[List[str]]
+    ) -> None:
+        if not conflict_on:
+            raise OrmException('conflict_on must contain at least one column')
+        all_columns = cls.__table__.c.keys()
+        unknown = [x for x in [*conflict_on, *(update or ())] if x not in all_columns]
+        if unknown:
+            raise OrmException(f'Unknown columns {", ".join(unknown)}')
+
+    async def upsert(
+        self: MODEL, conflict_on: List[str], update: Optional[List[str]] = None
+    ) -> MODEL:
+        await self.__class__.upsert_many([self], conflict_on, update)
+        return self
+
+    # pylint: disable=protected-access
+    @classmethod
+    async def upsert_many(
+        cls: Type[MODEL],
+        instances: List[MODEL],
+        conflict_on: List[str],
+        update: Optional[List[str]] = None,
+        chunk_size: int = 500,
+    ) -> List[MODEL]:
+        """
+        Inserts objects, updating rows which conflict with them on conflict_on
+        columns. By default, all inserted columns except conflict_on are updated
+        """
+        cls._check_upsert_columns(conflict_on, update)
+        keys = set()
+        groups = defaultdict(list)
+        for instance in instances:
+            key = tuple(getattr(instance, x) for x in conflict_on)
+            if None in key:
+                # NULL values never conflict, the row can't be found after insert
+                raise OrmException(
+                    f'Value of conflict_on column '
+                    f'{conflict_on[key.index(None)]} is None'
+                )
+            if key in keys:
+                raise OrmException(f'Duplicate values {key} of conflict_on columns')
+            keys.add(key)
+            groups[cls._database(instance.pkey_value)].append(instance)
+        for database, group in groups.items():
+            async with database.transaction():
+                for i in range(0, len(group), chunk_size):
+                    await cls._upsert_chunk(
+                        database, group[i : i + chunk_size], conflict_on, update
+                    )
+            cls._invalidate_cache(database)
+        session = current_session.get()
+        for instance in instances:
+            instance.__bound__ = True
+            instance._take_snapshot()
+            instance.__modified__.clear()
+            if session is not None:
+                session.add(instance)
+        return instances
+
+    @classmethod
+    async def _upsert_chunk(
+        cls,
+        database: DatabaseEntry,
+        instances: List[MODEL],
+        conflict_on: List[str],
+        update: Optional[List[str]],
+    ) -> None:
+        table = cls.__table__
+        pkey_name = cls.__pkey_name__
+        conflict_columns = [table.c[x] for x in conflict_on]
+        pkeys = {}
+        for group in _split_by_pkey(instances):
+            if not group:
+                continue
+            rows = [x._insert_data() for x in group]
+            query = dialect_insert(database.dialect, table)
+            if query is None:
+                raise OrmException(f'upsert is not supported by {database.dialect}')
+            query = query.values(rows)
+            if update is None:
+                set_columns = [x for x in rows[0] if x not in conflict_on]
+            else:
+                set_columns = update
+            if not set_columns:
+                # DO NOTHING doesn't return conflicting rows
+                set_columns = conflict_on
+            # Primary key of existing rows isn't changed, it's only set
+            # if it's a conflict column and then has the same value
+            query = query.on_conflict_do_update(
+                index_elements=conflict_columns,
+                set_={
+                    x: query.excluded[x]
+                    for x in set_columns
+                    if x != pkey_name or x in conflict_on
+                },
+            )
+            if database.is_sqlite:
+                await cls._execute(database, 'upsert', 'execute', query)
+                continue
+            for row in await cls._execute(
+                database,
+                'upsert',
+                'fetch_all',
+                query.returning(table.c[pkey_name], *conflict_columns),
+            ):
+                pkeys[tuple(row[x] for x in conflict_on)] = row[pkey_name]
+        if database.is_sqlite:
+            # RETURNING is not supported for SQLite by SQLAlchemy 1.4,
+            # so ids are selected by conflict_on values
+            keys = [tuple(getattr(x, name) for name in conflict_on) for x in instances]
+            if len(conflict_columns) == 1:
+                condition = expanding_in(conflict_columns[0], [x[0] for x in keys])
+            else:
+                condition = or_(
+                    *[
+                        and_(
+                            *[
+                                column == positional_literal(value, column)
+                                for column, value in zip(conflict_columns, key)
+                            ]
+                        )
+                        for key in keys
+                    ]
+                )
+            for row in await cls._execute(
+                database,
+                'upsert',
+                'fetch_all',
+                select([table.c[pkey_name], *conflict_columns]).where(condition),
+            ):
+                pkeys[tuple(row[x] for x in conflict_on)] = row[pkey_name]
+        for instance in instances:
+            pkey = pkeys[tuple(getattr(instance, x) for x in conflict_on)]
+            if instance.pkey_value == pkey:
+                continue
+            if instance.__bound__:
+                # Raised inside the transaction, so the upsert is rolled back
+                raise OrmException(
+                    f'Object with {pkey_name}={instance.pkey_value} conflicts '
+                    f'with the row with {pkey_name}={pkey}'
+                )
+            instance.pkey_value = pkey
+
+    @classmethod
+    def _projection(
+        cls, only: Optional[List[str]], defer: Optional[List[str]]
+    ) -> Optional[FrozenSet[str]]:
+        """
+        Returns names of columns to be loaded or None to load default columns
+        """
+        if only is None and defer is None:
+            return None
+        if cls.__hydrator__ is None:
+            raise OrmException('Column projection is not supported by this model')
+        all_columns = set(cls.__table__.c.keys())
+        columns = set(only) if only is not None else all_columns - cls.__deferred__
+        if defer is not None:
+            columns -= set(defer)
+        unknown = (columns | set(defer or ())) - all_columns
+        if unknown:
+            raise OrmException(f'Unknown columns {", ".join(sorted(unknown))}')
+        columns.add(cls.__pkey_name__)
+        return frozenset(columns)
+
+    @classmethod
+    def _select_query(cls, columns: Optional[AbstractSet[str]] = None) -> Select:
+        table = cls.__table__
+        if columns is None:
+            # Columns can't be deferred if model doesn't support hydrator
+            if not cls.__deferred__ or cls.__hydrator__ is None:
+                return table.select()
+            columns = set(table.c.keys()) - cls.__deferred__
+        return select([x for x in table.columns if x.name in columns])
+
+    @classmethod
+    def _partial_hydrator(cls, columns: FrozenSet[str]) -> Optional[HYDRATOR]:
+        try:
+            return cls.__partial_hydrators__[columns]
+        except KeyError:
+            hydrator = cls.__partial_hydrators__[columns] = build_hydrator(cls, columns)
+            return hydrator
+
     @classmethod
-    def _generate_query(cls, where, order_by, limit, offset):
+    def _generate_query(cls, where, order_by, limit, offset, columns=None):
+        is_custom = isinstance(where, str) or (
+            isinstance(where, ClauseElement) and not isinstance(where, ColumnElement)
+        )
+        if is_custom and columns is not None:
+            raise OrmException('only and defer can\'t be used with custom queries')
         if isinstance(where, str):
             return where
-        if isinstance(where, ClauseElement) and not isinstance(where, ColumnElement):
+        if is_custom:
             query = where
         else:
-            query = cls.__table__.select()
+            query = cls._select_query(columns)
             if where is not None:
                 query = query.where(where)
         if order_by is not None:
@@ -397,6 +1035,135 @@ class OrmModel(BaseModel, metaclass=OrmModelMeta):
             query = query.offset(offset)
         return query
 
+    @classmethod
+    async def _fetch(
+        cls,
+        method: str,
+        query,
+        values: dict = None,
+        database: Optional[DatabaseEntry] = None,
+        operation: str = 'select',
+        hydrate: Optional[Callable[[Any], Any]] = None,
+    ):
+        """
+        Executes read query, using query cache and replicas.
+        If hydrate is passed, it is applied to the result, time spent
+        in it is reported to after_hydrate handlers
+        """
+        if database is None:
+            database = cls._database()
+        cache = cls.__query_cache__
+        # Results read inside a transaction can contain uncommitted changes,
+        # which must not be visible to other tasks. Reads forced to the primary
+        # database must not get results of lagging replicas from the cache
+        if cache is not None and (force_primary.get() or database.in_transaction()):
+            cache = None
+        key = generation = None
+        if cache is not None:
+            key = (database.name, cache.make_key(method, query, values))
+            hit, res = cache.get(key)
+            if hit:
+                return res if hydrate is None else hydrate(res)
+            generation = cache.generation
+        events = FoxOrm.events
+        if events.active:
+            res, event = await events.run(
+                cls,
+                operation,
+                database,
+                query,
+                values,
+                lambda: database.read(method, query, values),
+                count_rows=method != 'fetch_val',
+            )
+        else:
+            event = None
+            res = await database.read(method, query, values)
+        if cache is not None:
+            cache.set(key, res, generation)
+        if hydrate is None:
+            return res
+        if event is not None:
+            return events.hydrate(event, hydrate, res)
+        return hydrate(res)
+
+    @classmethod
+    async def _execute(
+        cls,
+        database: DatabaseEntry,
+        operation: str,
+        method: str,
+        query,
+        values=None,
+    ):
+        """
+        Executes query on the primary database, reporting it to event handlers
+        """
+        events = FoxOrm.events
+        if not events.active:
+            return await getattr(database.db, method)(query, values)
+        res, _ = await events.run(
+            cls,
+            operation,
+            database,
+            query,
+            values,
+            lambda: getattr(database.db, method)(query, values),
+            count_rows=method == 'fetch_all',
+        )
+        return res
+
+    @classmethod
+    def _invalidate_cache(cls, database: DatabaseEntry):
+        if cls.__query_cache__ is not None:
+            database.invalidate_cache(cls.__query_cache__)
+
+    @classmethod
+    def _from_row(
+        cls: Type[MODEL],
+        row: Mapping,
+        skip_parsing=False,
+        refresh=False,
+        columns: Optional[FrozenSet[str]] = None,
+    ) -> MODEL:
+        session = current_session.get()
+        if session is not None and not refresh:
+            try:
+                obj = session.get(cls, row[cls.__pkey_name__])
+            except KeyError:
+                obj = None
+            if obj is not None:
+                return obj
+        if skip_parsing:
+            if columns is None and not cls.__deferred__:
+                obj = cls.construct(row)
+            else:
+                # Defaults must not be set for columns, which were not loaded
+                values = dict(getattr(row, '_mapping', row))
+                obj = cls._construct_validated(values, set(values))
+        else:
+            if columns is None:
+                hydrator = cls.__hydrator__
+            else:
+                hydrator = cls._partial_hydrator(columns)
+            # SQLAlchemy rows warn on access by column name, use mapping instead
+            hydrated = hydrator(getattr(row, '_mapping', row)) if hydrator else None
+            if hydrated is not None:
+                obj = cls._construct_validated(*hydrated)
+            else:
+                obj = cls.parse_obj(row)
+        obj.__bound__ = True
+        if cls.__json_columns__:
+            object.__setattr__(obj, '__snapshot__', _PENDING_SNAPSHOT)
+            # In-place changes of JSON columns don't call __setattr__,
+            # so the unit of work checks these objects on flush
+            unit_of_work = current_unit_of_work.get()
+            if unit_of_work is not None:
+                unit_of_work.add(obj)
+        if session is not None:
+            session.add(obj)
+        return obj
+
     @classmethod
     async def select(
         cls: Type[MODEL],
@@ -405,16 +1172,19 @@ class OrmModel(BaseModel, metaclass=OrmModelMeta):
         *,
         order_by=None,
         skip_parsing=False,
+        refresh=False,
+        only: Optional[List[str]] = None,
+        defer: Optional[List[str]] = None,
     ) -> Optional[MODEL]:
-        construct_func = cls.construct if skip_parsing else cls.parse_obj
-        res = await FoxOrm.db.fetch_one(
-            cls._generate_query(where, order_by, None, None), values
+        columns = cls._projection(only, defer)
+        return await cls._fetch(
+            'fetch_one',
+            cls._generate_query(where, order_by, None, None, columns),
+            values,
+            hydrate=lambda res: cls._from_row(res, skip_parsing, refresh, columns)
+            if res
+            else None,
         )
-        if not res:
-            return None
-        res = construct_func(res)
-        res.__bound__ = True
-        return res
 
     @classmethod
     async def select_all(
@@ -426,34 +1196,152 @@ class OrmModel(BaseModel, metaclass=OrmModelMeta):
         limit=None,
         offset=None,
         skip_parsing=False,
+        refresh=False,
+        only: Optional[List[str]] = None,
+        defer: Optional[List[str]] = None,
     ) -> List[MODEL]:
-        construct_func = cls.construct if skip_parsing else cls.parse_obj
-        q_res = await FoxOrm.db.fetch_all(
-            cls._generate_query(where, order_by, limit, offset), values
+        columns = cls._projection(only, defer)
+        return await cls._fetch(
+            'fetch_all',
+            cls._generate_query(where, order_by, limit, offset, columns),
+            values,
+            hydrate=lambda q_res: [
+                cls._from_row(x, skip_parsing, refresh, columns) for x in q_res
+            ],
         )
-        res = []
-        for x in q_res:
-            res.append(construct_func(x))
-            res[-1].__bound__ = True
-        return res
+
+    @classmethod
+    async def select_iter(
+        cls: Type[MODEL],
+        where=None,
+        values: dict = None,
+        *,
+        order_by=None,
+        limit=None,
+        offset=None,
+        skip_parsing=False,
+        refresh=False,
+        chunk_size=None,
+        only: Optional[List[str]] = None,
+        defer: Optional[List[str]] = None,
+    ) -> AsyncIterator[Union[MODEL, List[MODEL]]]:
+        columns = cls._projection(only, defer)
+        query = cls._generate_query(where, order_by, limit, offset, columns)
+        database = cls._database()
+        events = FoxOrm.events
+        event = None
+        if events.active:
+            event = events.start(cls, 'select_iter', database, query, values)
+        hydration_time = 0.0
+        chunk = []
+        async with database.read_db() as db:
+            rows = db.iterate(query, values)
+            if event is not None:
+                rows = events.iterate(event, rows)
+            async for x in rows:
+                if event is not None:
+                    start = time.perf_counter()
+                    obj = cls._from_row(x, skip_parsing, refresh, columns)
+                    hydration_time += time.perf_counter() - start
+                else:
+                    obj = cls._from_row(x, skip_parsing, refresh, columns)
+                if chunk_size is None:
+                    yield obj
+                    continue
+                chunk.append(obj)
+                if len(chunk) >= chunk_size:
+                    yield chunk
+                    chunk = []
+        if event is not None:
+            events.finish_hydration(event, hydration_time)
+        if chunk:
+            yield chunk
+
+    @classmethod
+    async def paginate(
+        cls: Type[MODEL],
+        where=None,
+        values: dict = None,
+        *,
+        order_by=None,
+        after: Optional[str] = None,
+        limit: int,
+        skip_parsing=False,
+        refresh=False,
+        only: Optional[List[str]] = None,
+        defer: Optional[List[str]] = None,
+    ) -> Page[MODEL]:
+        if isinstance(where, str) or (
+            isinstance(where, ClauseElement) and not isinstance(where, ColumnElement)
+        ):
+            raise OrmException('paginate can\'t be used with custom queries')
+        keys = parse_order_by(cls, order_by)
+        columns = cls._projection(only, defer)
+        # Columns of the last object are needed to build next cursor
+        key_names = {x.name for x, _ in keys}
+        if columns is not None:
+            columns |= key_names
+        elif key_names & cls.__deferred__ and cls.__hydrator__ is not None:
+            columns = cls._projection(None, []) | key_names
+        query = cls._select_query(columns)
+        if where is not None:
+            query = query.where(where)
+        if after is not None:
+            query = query.where(keyset_condition(keys, decode_cursor(cls, keys, after)))
+        query = query.order_by(
+            *[column.desc() if desc else column.asc() for column, desc in keys]
+        ).limit(limit + 1)
+        items, has_more = await cls._fetch(
+            'fetch_all',
+            query,
+            values,
+            operation='paginate',
+            hydrate=lambda rows: (
+                [
+                    cls._from_row(x, skip_parsing, refresh, columns)
+                    for x in rows[:limit]
+                ],
+                len(rows) > limit,
+            ),
+        )
+        next_cursor = None
+        if has_more and items:
+            next_cursor = encode_cursor(keys, items[-1])
+        return Page(items, next_cursor)
 
     @classmethod
     async def exists(cls: Type[MODEL], where, values: dict = None) -> bool:
         query = cls._generate_query(where, None, None, None)
         query = exists(query).select()
-        return await FoxOrm.db.fetch_val(query, values)
+        return await cls._fetch('fetch_val', query, values, operation='exists')
 
     @classmethod
     async def _delete_cls(cls, where, values: dict = None):
         query = cls.__table__.delete().where(where)
-        await FoxOrm.db.execute(query, values)
+        database = cls._database()
+        await cls._execute(database, 'delete', 'execute', query, values)
+        cls._invalidate_cache(database)
+        session = current_session.get()
+        if session is not None:
+            session.remove_all(cls)
 
     async def _delete_inst(self):
         self.ensure_id()
         table = self.__table__
-        query = table.delete().where(self.pkey_column == self.pkey_value)
+        database = self._database(self.pkey_value)
+        query = database.statement_cache.get(
+            (self.__class__, 'delete'),
+            lambda: table.delete().where(self.pkey_column == bindparam('_pkey')),
+        ).bindparams(_pkey=self.pkey_value)
+        session = current_session.get()
+        if session is not None:
+            session.remove(self)
+        unit_of_work = current_unit_of_work.get()
+        if unit_of_work is not None:
+            unit_of_work.discard(self)
         self.__bound__ = False
-        await FoxOrm.db.execute(query)
+        await self._execute(database, 'delete', 'execute', query)
+        self._invalidate_cache(database)
 
     # pylint: disable=bad-classmethod-argument,no-else-return
     @class_or_instancemethod
@@ -468,13 +1356,152 @@ class OrmModel(BaseModel, metaclass=OrmModelMeta):
         query = select([func.count()]).select_from(cls.__table__)
         if where is not None:
             query = query.where(where)
-        return await FoxOrm.db.fetch_val(query, values)
+        return await cls._fetch('fetch_val', query, values, operation='count')
 
+    # pylint: disable=too-many-arguments
     @classmethod
-    async def get(cls: Type[MODEL], obj_id: int, skip_parsing=False) -> Optional[MODEL]:
-        # false positive
-        # pylint: disable=comparison-with-callable
-        return await cls.select(cls.pkey_column == obj_id, skip_parsing=skip_parsing)
+    async def aggregate(
+        cls,
+        *,
+        where=None,
+        values: dict = None,
+        group_by: Optional[List[ColumnElement]] = None,
+        having=None,
+        order_by=None,
+        limit: Optional[int] = None,
+        **aggregates: ColumnElement,
+    ) -> List[tuple]:
+        """
+        Returns named tuples with values of group_by columns and aggregates.
+        sum=A.c.n is a shorthand for sum=func.sum(A.c.n), this works for sum,
+        avg, min, max and count. Other values are used as is, for example
+        total=func.count() or weighted=func.sum(A.c.n * A.c.weight)
+        """
+        if not aggregates:
+            raise OrmException('At least one aggregate is required')
+        group_by = group_by or []
+        names = []
+        for expression in group_by:
+            if not isinstance(expression, (Column, Label)):
+                raise OrmException(
+                    'group_by must contain columns or labeled expressions'
+                )
+            names.append(expression.name)
+        columns = list(group_by)
+        for name, expression in aggregates.items():
+            if name in AGGREGATE_FUNCTIONS and isinstance(expression, Column):
+                expression = getattr(func, name)(expression)
+            columns.append(expression.label(name))
+            names.append(name)
+        result_type = aggregate_result_type(tuple(names))
+        query = select(columns).select_from(cls.__table__)
+        if where is not None:
+            query = query.where(where)
+        if group_by:
+            query = query.group_by(*group_by)
+        if having is not None:
+            query = query.having(having)
+        if order_by is not None:
+            if not isinstance(order_by, list):
+                order_by = [order_by]
+            query = query.order_by(*order_by)
+        if limit is not None:
+            query = query.limit(limit)
+        return await cls._fetch(
+            'fetch_all',
+            query,
+            values,
+            operation='aggregate',
+            hydrate=lambda rows: [
+                result_type(*[row[i] for i in range(len(names))]) for row in rows
+            ],
+        )
+
+    @classmethod
+    async def get(
+        cls: Type[MODEL],
+        obj_id: int,
+        skip_parsing=False,
+        refresh=False,
+        only: Optional[List[str]] = None,
+        defer: Optional[List[str]] = None,
+    ) -> Optional[MODEL]:
+        session = current_session.get()
+        if session is not None and not refresh:
+            obj = session.get(cls, obj_id)
+            if obj is not None:
+                return obj
+        columns = cls._projection(only, defer)
+        database = cls._database(obj_id)
+        query = database.statement_cache.get(
+            (cls, 'get', columns),
+            # false positive
+            # pylint: disable=comparison-with-callable
+            lambda: cls._select_query(columns).where(
+                cls.pkey_column == bindparam('_pkey')
+            ),
+        ).bindparams(_pkey=obj_id)
+        return await cls._fetch(
+            'fetch_one',
+            query,
+            database=database,
+            operation='get',
+            hydrate=lambda res: cls._from_row(res, skip_parsing, refresh, columns)
+            if res
+            else None,
+        )
+
+    # pylint: disable=protected-access
+    @classmethod
+    async def _undefer_cls(
+        cls, instances: List[MODEL], *fields: str, chunk_size: int = 500
+    ) -> None:
+        all_columns = cls.__table__.c.keys()
+        for field in fields:
+            if field not in all_columns:
+                raise OrmException(f'Unknown column {field}')
+        groups = defaultdict(list)
+        for instance in instances:
+            instance.ensure_id()
+            missing = frozenset(
+                x for x in fields or all_columns if x not in instance.__dict__
+            )
+            if missing:
+                groups[(cls._database(instance.pkey_value), missing)].append(instance)
+        for (database, missing), group in groups.items():
+            columns = missing | {cls.__pkey_name__}
+            hydrator = cls._partial_hydrator(columns)
+            for i in range(0, len(group), chunk_size):
+                by_id = {x.pkey_value: x for x in group[i : i + chunk_size]}
+                rows = await cls._fetch(
+                    'fetch_all',
+                    cls._select_query(columns).where(cls.pkey_column.in_(list(by_id))),
+                    database=database,
+                    operation='undefer',
+                )
+                for row in rows:
+                    hydrated = hydrator(getattr(row, '_mapping', row))
+                    if hydrated is None:
+                        # Some values are not valid, pydantic will raise
+                        # ValidationError with proper description
+                        cls.parse_obj(row)
+                    values, fields_set = hydrated
+                    instance = by_id[values[cls.__pkey_name__]]
+                    for name in missing:
+                        instance.__dict__[name] = values[name]
+                    instance.__fields_set__.update(fields_set & missing)
+                    instance._take_snapshot(missing)
+
+    async def _undefer_inst(self, *fields: str) -> None:
+        await self.__class__._undefer_cls([self], *fields)
+
+    # pylint: disable=bad-classmethod-argument,no-else-return
+    @class_or_instancemethod
+    async def undefer(self_or_cls, *args, **kwargs) -> None:
+        if isinstance(self_or_cls, type):
+            return await self_or_cls._undefer_cls(*args, **kwargs)
+        else:
+            return await self_or_cls._undefer_inst(*args, **kwargs)
 
     async def fetch_related(self, *fields: str) -> None:
         self.ensure_id()
@@ -486,5 +1513,60 @@ class OrmModel(BaseModel, metaclass=OrmModelMeta):
             tasks.append(relation.fetch())
         await asyncio.gather(*tasks)
 
+    @classmethod
+    async def _batch_relations(
+        cls: Type[MODEL],
+        method: str,
+        instances: List[MODEL],
+        fields: Tuple[str, ...],
+        chunk_size: int,
+        batch: Callable[[_GenericIterableRelation, list, int], Awaitable[None]],
+    ) -> None:
+        """
+        Calls batch with class relation and its copies of all instances
+        for every field
+        """
+        for instance in instances:
+            instance.ensure_id()
+        tasks = []
+        for field in fields:
+            relation: _GenericIterableRelation = getattr(cls, field)
+            if not isinstance(relation, _GenericIterableRelation):
+                raise OrmException(f'{method} argument is not a relation')
+            tasks.append(
+                batch(relation, [getattr(x, field) for x in instances], chunk_size)
+            )
+        await asyncio.gather(*tasks)
+
+    # pylint: disable=protected-access
+    @classmethod
+    async def prefetch_related(
+        cls: Type[MODEL], instances: List[MODEL], *fields: str, chunk_size: int = 500
+    ) -> None:
+        await cls._batch_relations(
+            'prefetch_related',
+            instances,
+            fields,
+            chunk_size,
+            _GenericIterableRelation._prefetch,
+        )
+
+    # pylint: disable=protected-access
+    @classmethod
+    async def annotate_counts(
+        cls: Type[MODEL], instances: List[MODEL], *fields: str, chunk_size: int = 500
+    ) -> None:
+        """
+        Counts related objects of all instances with one query per relation,
+        counts are available as instance.relation.cached_count
+        """
+        await cls._batch_relations(
+            'annotate_counts',
+            instances,
+            fields,
+            chunk_size,
+            _GenericIterableRelation._annotate_counts,
+        )
+
 
 __all__ = ['OrmModel']
@@ -0,0 +1,143 @@
+import base64
+import binascii
+import json
+from typing import (
+    Any,
+    Generic,
+    Iterator,
+    List,
+    Optional,
+    Tuple,
+    Type,
+    TypeVar,
+    TYPE_CHECKING,
+)
+
+from pydantic.json import pydantic_encoder
+from sqlalchemy import Column, and_, or_, tuple_
+from sqlalchemy.sql import operators
+from sqlalchemy.sql.elements import ColumnElement, UnaryExpression
+
+from fox_orm.exceptions import OrmException
+from fox_orm.internal.utils import positional_literal
+
+if TYPE_CHECKING:
+    from fox_orm.model import OrmModel
+
+MODEL = TypeVar('MODEL', bound='OrmModel')
+
+# Column and whether it is sorted in descending order
+KEY = Tuple[Column, bool]
+
+
+class Page(Generic[MODEL]):
+    items: List[MODEL]
+    # None if this is the last page
+    next_cursor: Optional[str]
+
+    def __init__(self, items: List[MODEL], next_cursor: Optional[str]):
+        self.items = items
+        self.next_cursor = next_cursor
+
+    def __iter__(self) -> Iterator[MODEL]:
+        return iter(self.items)
+
+    def __len__(self):
+        return len(self.items)
+
+    def __repr__(self):
+        return f'Page(items={self.items!r}, next_cursor={self.next_cursor!r})'
+
+
+def parse_order_by(model: Type['OrmModel'], order_by) -> List[KEY]:
+    """
+    Converts order_by to list of keys, ending with primary key,
+    so every row has unique position
+    """
+    if order_by is None:
+        order_by = []
+    elif not isinstance(order_by, list):
+        order_by = [order_by]
+    keys = []
+    for item in order_by:
+        desc = False
+        if isinstance(item, UnaryExpression) and item.modifier in (
+            operators.asc_op,
+            operators.desc_op,
+        ):
+            desc = item.modifier is operators.desc_op
+            item = item.element
+        if not isinstance(item, Column) or item.table is not model.__table__:
+            raise OrmException(
+                'paginate order_by must contain only columns of the model, '
+                'optionally with .asc() or .desc()'
+            )
+        keys.append((item, desc))
+    if not any(x.primary_key for x, _ in keys):
+        keys.append((model.pkey_column, False))
+    return keys
+
+
+def keys_fingerprint(keys: List[KEY]) -> List[str]:
+    return [('-' if desc else '') + column.name for column, desc in keys]
+
+
+def encode_cursor(keys: List[KEY], obj: 'OrmModel') -> str:
+    values = [getattr(obj, column.name) for column, _ in keys]
+    if any(x is None for x in values):
+        raise OrmException('paginate does not support NULL values in order_by columns')
+    data = json.dumps(
+        {'k': keys_fingerprint(keys), 'v': values},
+        default=pydantic_encoder,
+        separators=(',', ':'),
+    )
+    return base64.urlsafe_b64encode(data.encode()).decode().rstrip('=')
+
+
+def decode_cursor(model: Type['OrmModel'], keys: List[KEY], cursor: str) -> List[Any]:
+    try:
+        data = json.loads(base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)))
+        fingerprint, raw_values = data['k'], data['v']
+    except (binascii.Error, ValueError, TypeError, KeyError) as e:
+        raise OrmException('Invalid cursor') from e
+    if fingerprint != keys_fingerprint(keys) or len(raw_values) != len(keys):
+        raise OrmException('Cursor does not match order_by')
+    values = []
+    for (column, _), raw_value in zip(keys, raw_values):
+        # Values are converted back to python types by model fields,
+        # so they are bound with proper types
+        value, errors = model.__fields__[column.name].validate(
+            raw_value, {}, loc=column.name
+        )
+        if errors or value is None:
+            raise OrmException('Invalid cursor')
+        values.append(value)
+    return values
+
+
+def keyset_condition(keys: List[KEY], values: List[Any]) -> ColumnElement:
+    """
+    Returns condition, selecting rows, which are placed after
+    the row with given values in order specified by keys
+    """
+
+    def bound(i: int):
+        return positional_literal(values[i], keys[i][0])
+
+    if len({desc for _, desc in keys}) == 1:
+        # Row value comparison can use index on all columns
+        left = tuple_(*[column for column, _ in keys])
+        right = tuple_(*[bound(i) for i in range(len(keys))])
+        return left < right if keys[0][1] else left > right
+    conditions = []
+    for i, (column, desc) in enumerate(keys):
+        conditions.append(
+            and_(
+                *[keys[j][0] == bound(j) for j in range(i)],
+                column < bound(i) if desc else column > bound(i),
+            )
+        )
+    return or_(*conditions)
+
+
+__all__ = ['Page']
@@ -1,4 +1,4 @@
-import asyncio
+from collections import defaultdict
 from abc import abstractmethod, ABC
 from typing import (
     Union,
@@ -8,21 +8,47 @@ from typing import (
     Optional,
     List,
     Generic,
+    Callable,
+    Dict,
+    Tuple,
     TYPE_CHECKING,
 )
 
-from sqlalchemy import and_, select, Table, exists, MetaData, func
+from sqlalchemy import (
+    and_,
+    select,
+    Table,
+    MetaData,
+    func,
+    bindparam,
+    exists,
+    intersect,
+    union,
+)
+from sqlalchemy.sql import Select
+from sqlalchemy.sql.elements import TextClause
 
 from fox_orm import FoxOrm
 from fox_orm.exceptions import NotFetchedException, OrmException
-from fox_orm.internal.utils import full_import, OptionalAwaitable
+from fox_orm.internal.unit_of_work import current_unit_of_work
+from fox_orm.internal.utils import (
+    full_import,
+    OptionalAwaitable,
+    dialect_insert,
+    expanding_in,
+)
 
 if TYPE_CHECKING:
     from fox_orm.model import OrmModel
+    from fox_orm.internal.registry import DatabaseEntry
 
 MODEL = TypeVar('MODEL', bound='OrmModel')
 RELATION = TypeVar('RELATION', bound='_GenericIterableRelation')
 
+# Label of the parent id column in prefetch queries. Column names starting
+# with underscore are not allowed in models, so it can't clash with them
+PARENT_ID_LABEL = '_parent_id'
+
 
 class HashList(List[MODEL]):
     map: dict
@@ -47,8 +73,10 @@ class HashList(List[MODEL]):
     def delete(self, other: MODEL):
         if other.pkey_value not in self.map:
             return
-        del self[self.map[other.pkey_value]]
-        del self.map[other.pkey_value]
+        index = self.map.pop(other.pkey_value)
+        del self[index]
+        for x in self[index:]:
+            self.map[x.pkey_value] -= 1
 
     def __contains__(
         self, item: Optional[Union[MODEL, int]]
@@ -87,6 +115,8 @@ class _GenericIterableRelation(ABC):
     # Relation objects fetched
     _fetched: bool
     _objects: HashList
+    # Count set by OrmModel.annotate_counts()
+    _count: Optional[int]
 
     __modified__: dict
 
@@ -94,6 +124,7 @@ class _GenericIterableRelation(ABC):
         self._objects = HashList()
         self.__modified__ = {}
         self._fetched = False
+        self._count = None
         self._initialized = False
         self._copied = False
 
@@ -105,25 +136,238 @@ class _GenericIterableRelation(ABC):
     def _init_copy(self: RELATION, model: 'OrmModel') -> RELATION:
         ...
 
+    @abstractmethod
+    def _statement_key(self) -> tuple:
+        ...
+
+    @abstractmethod
+    def _fetch_query(self) -> TextClause:
+        ...
+
+    @abstractmethod
+    def _prefetch_query(self, ids: List[int]) -> Select:
+        ...
+
+    @abstractmethod
+    def _count_query(self, ids: List[int]) -> Select:
+        ...
+
+    @abstractmethod
+    def _ids_query(self) -> Select:
+        ...
+
+    @abstractmethod
+    def _has_query(self, other_id: int) -> TextClause:
+        ...
+
     @abstractmethod
     async def fetch_ids(self) -> List[int]:
         ...
 
     @abstractmethod
-    async def save(self) -> None:
+    async def _save(self, chunk_size: int = 500) -> None:
         ...
 
     @abstractmethod
     async def count(self) -> int:
         ...
 
+    async def save(self, chunk_size: int = 500) -> None:
+        unit_of_work = current_unit_of_work.get()
+        if unit_of_work is not None:
+            unit_of_work.add_relation(self)
+            return
+        await self._save(chunk_size)
+
+    def _database(self) -> 'DatabaseEntry':
+        # Related objects are stored in the database of the model instance,
+        # which owns the relation
+        # pylint: disable=protected-access
+        return self._from._database(self._model.pkey_value)
+
     async def fetch(self) -> None:
         self._check_model_state()
-        ids = await self.fetch_ids()
-        self._objects = HashList(
-            await asyncio.gather(*[self.objects_type.get(x) for x in ids])
+        # pylint: disable=protected-access
+        self._objects = await self.objects_type._fetch(
+            'fetch_all',
+            self._fetch_query(),
+            database=self._database(),
+            operation='relation.fetch',
+            hydrate=lambda rows: HashList(
+                [self.objects_type._from_row(x) for x in rows]
+            ),
         )
         self._fetched = True
+        self._count = None
+
+    async def _fetch_for_parents(
+        self,
+        relations: List[RELATION],
+        chunk_size: int,
+        operation: str,
+        build_query: Callable[[List[int]], Select],
+    ) -> List[Tuple[Dict[int, List[RELATION]], list]]:
+        """
+        Groups copies of this relation by database and model id and runs query
+        for every chunk of model ids. Returns relations by model id with fetched
+        rows for every database
+        """
+        self._raise_if_not_initialized()
+        by_database = defaultdict(lambda: defaultdict(list))
+        for relation in relations:
+            relation._check_model_state()
+            by_database[relation._database()][relation._model.pkey_value].append(
+                relation
+            )
+        result = []
+        for database, by_id in by_database.items():
+            ids = list(by_id)
+            rows = []
+            for i in range(0, len(ids), chunk_size):
+                # pylint: disable=protected-access
+                rows.extend(
+                    await self.objects_type._fetch(
+                        'fetch_all',
+                        build_query(ids[i : i + chunk_size]),
+                        database=database,
+                        operation=operation,
+                    )
+                )
+            result.append((by_id, rows))
+        return result
+
+    async def _prefetch(self, relations: List[RELATION], chunk_size: int = 500) -> None:
+        for by_id, rows in await self._fetch_for_parents(
+            relations, chunk_size, 'relation.prefetch', self._prefetch_query
+        ):
+            objects = {x: HashList() for x in by_id}
+            for row in rows:
+                values = dict(row)
+                parent_id = values.pop(PARENT_ID_LABEL)
+                # pylint: disable=protected-access
+                objects[parent_id].add(self.objects_type._from_row(values))
+            for parent_id, parent_relations in by_id.items():
+                for relation in parent_relations:
+                    relation._objects = HashList(objects[parent_id])
+                    relation._fetched = True
+                    relation._count = None
+
+    async def _annotate_counts(
+        self, relations: List[RELATION], chunk_size: int = 500
+    ) -> None:
+        for by_id, rows in await self._fetch_for_parents(
+            relations, chunk_size, 'relation.count', self._count_query
+        ):
+            counts = {x[0]: x[1] for x in rows}
+            for parent_id, parent_relations in by_id.items():
+                for relation in parent_relations:
+                    relation._count = counts.get(parent_id, 0)
+
+    @property
+    def cached_count(self) -> int:
+        """
+        Count set by OrmModel.annotate_counts() or number of fetched objects
+        """
+        self._raise_if_not_initialized()
+        if self._count is not None:
+            return self._count
+        if not self._fetched:
+            raise NotFetchedException(
+                'Count is not known for this relation, '
+                'first use .annotate_counts() or .fetch_related()'
+            )
+        return len(self._objects)
+
+    def _statement(self, shape: str, build: Callable[[], Select]) -> TextClause:
+        # Statements are built with _model_id parameter and shared between
+        # copies of the relation
+        statement = self._database().statement_cache.get(
+            (self._statement_key(), shape), build
+        )
+        return statement.bindparams(_model_id=self._model.pkey_value)
+
+    def _related_id(self, item: Union[MODEL, int]) -> int:
+        if isinstance(item, int):
+            return item
+        if not isinstance(item, self.objects_type):
+            raise OrmException('item is not instance of target model or id')
+        item.ensure_id()
+        return item.pkey_value
+
+    async def has(self, item: Union[MODEL, int]) -> bool:
+        """
+        Checks in the database if the object or id is in the relation,
+        without fetching it
+        """
+        self._check_model_state()
+        # pylint: disable=protected-access
+        return bool(
+            await self._to._fetch(
+                'fetch_val',
+                self._has_query(self._related_id(item)),
+                database=self._database(),
+                operation='relation.has',
+            )
+        )
+
+    async def _combine(
+        self,
+        other: '_GenericIterableRelation',
+        combine: Callable,
+        operation: str,
+        ids_only: bool,
+    ) -> Union[List[MODEL], List[int]]:
+        self._check_model_state()
+        self._check_compatible(other)
+        other._check_model_state()
+        database = self._database()
+        if other._database().name != database.name:
+            raise OrmException('given relation is stored in another database')
+        query = combine(self._ids_query(), other._ids_query())
+        # pylint: disable=protected-access
+        if ids_only:
+            return await self._to._fetch(
+                'fetch_all',
+                query,
+                database=database,
+                operation=operation,
+                hydrate=lambda rows: sorted(x[0] for x in rows),
+            )
+        return await self._to._fetch(
+            'fetch_all',
+            self._to._select_query()
+            .where(self._to.pkey_column.in_(query))
+            .order_by(self._to.pkey_column),
+            database=database,
+            operation=operation,
+            hydrate=lambda rows: [self._to._from_row(x) for x in rows],
+        )
+
+    async def intersect(
+        self, other: '_GenericIterableRelation', ids_only: bool = False
+    ) -> Union[List[MODEL], List[int]]:
+        """
+        Returns objects (or their ids if ids_only is set), which are in both
+        relations, using INTERSECT query without fetching relations
+        """
+        return await self._combine(other, intersect, 'relation.intersect', ids_only)
+
+    async def union(
+        self, other: '_GenericIterableRelation', ids_only: bool = False
+    ) -> Union[List[MODEL], List[int]]:
+        """
+        Returns objects (or their ids if ids_only is set), which are in any
+        of the relations, using UNION query without fetching relations
+        """
+        return await self._combine(other, union, 'relation.union', ids_only)
+
+    def _check_compatible(self, other: '_GenericIterableRelation'):
+        if not isinstance(other, _GenericIterableRelation):
+            raise OrmException('given parameter is not relation')
+        if other.objects_type != self.objects_type:
+            raise OrmException(
+                'given relation\'s objects type is incompatible with this relation\'s type'
+            )
 
     def _raise_if_not_initialized(self):
         if not self._initialized:
@@ -149,10 +393,18 @@ class _GenericIterableRelation(ABC):
 
     def add(self, other: MODEL):
         self._raise_if_not_initialized()
-        other.ensure_id()
         if not isinstance(other, self.objects_type):
             raise OrmException('other is not instance of target model')
+        unit_of_work = current_unit_of_work.get()
+        if unit_of_work is not None:
+            if not other.__bound__ or not self._model.__bound__:
+                # Will be added again after objects are inserted
+                unit_of_work.add_pending_relation_object(self, other)
+                return OptionalAwaitable(self.save)
+            unit_of_work.add_relation(self)
+        other.ensure_id()
         self._objects.add(other)
+        self._count = None
         self.__modified__[other.pkey_value] = True
         return OptionalAwaitable(self.save)
 
@@ -161,7 +413,11 @@ class _GenericIterableRelation(ABC):
         other.ensure_id()
         if not isinstance(other, self.objects_type):
             raise OrmException('other is not instance of target model')
+        unit_of_work = current_unit_of_work.get()
+        if unit_of_work is not None:
+            unit_of_work.add_relation(self)
         self._objects.delete(other)
+        self._count = None
         self.__modified__[other.pkey_value] = False
         return OptionalAwaitable(self.save)
 
@@ -191,22 +447,12 @@ class _GenericIterableRelation(ABC):
 
     def __and__(self, other: '_GenericIterableRelation') -> List[MODEL]:
         self._raise_if_not_fetched()
-        if not isinstance(other, _GenericIterableRelation):
-            raise OrmException('given parameter is not relation')
-        if other.objects_type != self.objects_type:
-            raise OrmException(
-                'given relation\'s objects type is incompatible with this relation\'s type'
-            )
+        self._check_compatible(other)
         return self._objects & other._objects
 
     def __or__(self, other: '_GenericIterableRelation') -> List[MODEL]:
         self._raise_if_not_fetched()
-        if not isinstance(other, _GenericIterableRelation):
-            raise OrmException('given parameter is not relation')
-        if other.objects_type != self.objects_type:
-            raise OrmException(
-                'given relation\'s objects type is incompatible with this relation\'s type'
-            )
+        self._check_compatible(other)
         return self._objects | other._objects
 
 
@@ -216,21 +462,6 @@ class ManyToMany(Generic[MODEL], _GenericIterableRelation):
     _this_id: str
     _other_id: str
 
-    async def _get_entry(self, other_id):
-        return await FoxOrm.db.fetch_val(
-            select(
-                [
-                    exists().where(
-                        and_(
-                            getattr(self._via.c, self._this_id)
-                            == self._model.pkey_value,
-                            getattr(self._via.c, self._other_id) == other_id,
-                        )
-                    )
-                ]
-            )
-        )
-
     # pylint: disable=unsubscriptable-object
     def __init__(self, to: Union[Type[MODEL], str], via: str):
         self._to = to
@@ -259,70 +490,164 @@ class ManyToMany(Generic[MODEL], _GenericIterableRelation):
         res._other_id = self._other_id
         return res
 
+    def _statement_key(self) -> tuple:
+        return ManyToMany, self._via, self._this_id
+
+    def _fetch_query(self) -> TextClause:
+        to_table = self._to.__table__
+        return self._statement(
+            'fetch',
+            lambda: self._to._select_query()
+            .select_from(
+                to_table.join(
+                    self._via,
+                    getattr(self._via.c, self._other_id) == self._to.pkey_column,
+                )
+            )
+            .where(getattr(self._via.c, self._this_id) == bindparam('_model_id')),
+        )
+
+    def _prefetch_query(self, ids: List[int]) -> Select:
+        to_table = self._to.__table__
+        this_id = getattr(self._via.c, self._this_id)
+        return (
+            self._to._select_query()
+            .add_columns(this_id.label(PARENT_ID_LABEL))
+            .select_from(
+                to_table.join(
+                    self._via,
+                    getattr(self._via.c, self._other_id) == self._to.pkey_column,
+                )
+            )
+            .where(this_id.in_(ids))
+        )
+
+    def _count_query(self, ids: List[int]) -> Select:
+        this_id = getattr(self._via.c, self._this_id)
+        return (
+            select([this_id, func.count()])
+            .select_from(self._via)
+            .where(this_id.in_(ids))
+            .group_by(this_id)
+        )
+
+    def _ids_query(self) -> Select:
+        return select([getattr(self._via.c, self._other_id)]).where(
+            getattr(self._via.c, self._this_id) == self._model.pkey_value
+        )
+
+    def _has_query(self, other_id: int) -> TextClause:
+        return self._statement(
+            'has',
+            lambda: select(
+                [
+                    exists().where(
+                        and_(
+                            getattr(self._via.c, self._this_id)
+                            == bindparam('_model_id'),
+                            getattr(self._via.c, self._other_id)
+                            == bindparam('_other_id'),
+                        )
+                    )
+                ]
+            ),
+        ).bindparams(_other_id=other_id)
+
     async def fetch_ids(self) -> List[int]:
         self._check_model_state()
+        # pylint: disable=protected-access
         return [
             x[self._other_id]
-            for x in await FoxOrm.db.fetch_all(
-                self._via.select().where(
-                    getattr(self._via.c, self._this_id) == self._model.pkey_value
-                )
+            for x in await self._to._fetch(
+                'fetch_all',
+                self._statement(
+                    'fetch_ids',
+                    lambda: self._via.select().where(
+                        getattr(self._via.c, self._this_id) == bindparam('_model_id')
+                    ),
+                ),
+                database=self._database(),
+                operation='relation.fetch_ids',
             )
         ]
 
     async def count(self) -> int:
         self._check_model_state()
-        return await FoxOrm.db.fetch_val(
-            select([func.count()])
-            .select_from(self._via)
-            .where(getattr(self._via.c, self._this_id) == self._model.pkey_value)
+        # pylint: disable=protected-access
+        return await self._to._fetch(
+            'fetch_val',
+            self._statement(
+                'count',
+                lambda: select([func.count()])
+                .select_from(self._via)
+                .where(getattr(self._via.c, self._this_id) == bindparam('_model_id')),
+            ),
+            database=self._database(),
+            operation='relation.count',
         )
 
-    async def save(self) -> None:
+    async def _save(self, chunk_size: int = 500) -> None:
         self._check_model_state()
-        queries = []
-        for k, v in self.__modified__.items():
-            entry_exists = await self._get_entry(k)
-            if v and not entry_exists:
-                queries.append(
-                    FoxOrm.db.execute(
+        database = self._database()
+        this_id = getattr(self._via.c, self._this_id)
+        other_id = getattr(self._via.c, self._other_id)
+        model_id = self._model.pkey_value
+        to_add = [k for k, v in self.__modified__.items() if v]
+        to_delete = [k for k, v in self.__modified__.items() if not v]
+        insert = dialect_insert(database.dialect, self._via)
+        async with database.transaction():
+            for i in range(0, len(to_add), chunk_size):
+                chunk = to_add[i : i + chunk_size]
+                rows = [{self._this_id: model_id, self._other_id: x} for x in chunk]
+                if insert is not None:
+                    await self._to._execute(
+                        database,
+                        'relation.save',
+                        'execute',
+                        insert.values(rows).on_conflict_do_nothing(),
+                    )
+                    continue
+                existing = {
+                    x[self._other_id]
+                    for x in await self._to._execute(
+                        database,
+                        'relation.save',
+                        'fetch_all',
+                        select([other_id]).where(
+                            and_(this_id == model_id, expanding_in(other_id, chunk))
+                        ),
+                    )
+                }
+                rows = [x for x in rows if x[self._other_id] not in existing]
+                if rows:
+                    await self._to._execute(
+                        database,
+                        'relation.save',
+                        'execute_many',
                         self._via.insert(),
-                        {self._this_id: self._model.pkey_value, self._other_id: k},
+                        rows,
                     )
-                )
-            elif not v and entry_exists:
-                queries.append(
-                    FoxOrm.db.execute(
-                        self._via.delete().where(
-                            and_(
-                                getattr(self._via.c, self._this_id)
-                                == self._model.pkey_value,
-                                getattr(self._via.c, self._other_id) == k,
-                            )
+            for i in range(0, len(to_delete), chunk_size):
+                await self._to._execute(
+                    database,
+                    'relation.save',
+                    'execute',
+                    self._via.delete().where(
+                        and_(
+                            this_id == model_id,
+                            expanding_in(other_id, to_delete[i : i + chunk_size]),
                         )
-                    )
+                    ),
                 )
-        await asyncio.gather(*queries)
+        # pylint: disable=protected-access
+        self._from._invalidate_cache(database)
+        self._to._invalidate_cache(database)
         self.__modified__ = {}
 
 
 class OneToMany(Generic[MODEL], _GenericIterableRelation):
     key: str
 
-    async def _get_entry(self, other_id):
-        return await FoxOrm.db.fetch_val(
-            select(
-                [
-                    exists().where(
-                        and_(
-                            getattr(self._to.c, self.key) == self._model.pkey_value,
-                            self._to.pkey_column == other_id,
-                        )
-                    )
-                ]
-            )
-        )
-
     # pylint: disable=unsubscriptable-object
     def __init__(self, to: Union[Type[MODEL], str], key: str):
         self._to = to
@@ -340,49 +665,123 @@ class OneToMany(Generic[MODEL], _GenericIterableRelation):
         self._raise_if_not_initialized()
         res = OneToMany(to=self._to, key=self.key)
         res._model = model
+        res._from = self._from
         res._initialized = True
         res._copied = True
         return res
 
+    def _statement_key(self) -> tuple:
+        return OneToMany, self._to, self.key
+
+    def _fetch_query(self) -> TextClause:
+        return self._statement(
+            'fetch',
+            lambda: self._to._select_query().where(
+                getattr(self._to.c, self.key) == bindparam('_model_id')
+            ),
+        )
+
+    def _prefetch_query(self, ids: List[int]) -> Select:
+        key = getattr(self._to.c, self.key)
+        return (
+            self._to._select_query()
+            .add_columns(key.label(PARENT_ID_LABEL))
+            .where(key.in_(ids))
+        )
+
+    def _count_query(self, ids: List[int]) -> Select:
+        key = getattr(self._to.c, self.key)
+        return select([key, func.count()]).where(key.in_(ids)).group_by(key)
+
+    def _ids_query(self) -> Select:
+        return select([self._to.pkey_column]).where(
+            getattr(self._to.c, self.key) == self._model.pkey_value
+        )
+
+    def _has_query(self, other_id: int) -> TextClause:
+        return self._statement(
+            'has',
+            lambda: select(
+                [
+                    exists().where(
+                        and_(
+                            getattr(self._to.c, self.key) == bindparam('_model_id'),
+                            self._to.pkey_column == bindparam('_other_id'),
+                        )
+                    )
+                ]
+            ),
+        ).bindparams(_other_id=other_id)
+
     async def fetch_ids(self) -> List[int]:
         self._check_model_state()
+        # pylint: disable=protected-access
         return [
             x[self._to.__pkey_name__]
-            for x in await FoxOrm.db.fetch_all(
-                select([self._to.pkey_column]).where(
-                    getattr(self._to.c, self.key) == self._model.pkey_value
-                )
+            for x in await self._to._fetch(
+                'fetch_all',
+                self._statement(
+                    'fetch_ids',
+                    lambda: select([self._to.pkey_column]).where(
+                        getattr(self._to.c, self.key) == bindparam('_model_id')
+                    ),
+                ),
+                database=self._database(),
+                operation='relation.fetch_ids',
             )
         ]
 
     async def count(self) -> int:
         self._check_model_state()
-        return await FoxOrm.db.fetch_val(
-            select([func.count()])
-            .select_from(self._to.__table__)
-            .where(getattr(self._to.c, self.key) == self._model.pkey_value)
+        # pylint: disable=protected-access
+        return await self._to._fetch(
+            'fetch_val',
+            self._statement(
+                'count',
+                lambda: select([func.count()])
+                .select_from(self._to.__table__)
+                .where(getattr(self._to.c, self.key) == bindparam('_model_id')),
+            ),
+            database=self._database(),
+            operation='relation.count',
         )
 
-    async def save(self) -> None:
+    async def _save(self, chunk_size: int = 500) -> None:
         self._check_model_state()
-        queries = []
-        for k, v in self.__modified__.items():
-            entry_exists = await self._get_entry(k)
-            if v and not entry_exists:
-                queries.append(
-                    FoxOrm.db.execute(
-                        self._to.__table__.update().where(self._to.pkey_column == k),
-                        {self.key: self._model.pkey_value},
-                    )
+        database = self._database()
+        table = self._to.__table__
+        key = getattr(self._to.c, self.key)
+        model_id = self._model.pkey_value
+        to_add = [k for k, v in self.__modified__.items() if v]
+        to_delete = [k for k, v in self.__modified__.items() if not v]
+        async with database.transaction():
+            for i in range(0, len(to_add), chunk_size):
+                await self._to._execute(
+                    database,
+                    'relation.save',
+                    'execute',
+                    table.update().where(
+                        expanding_in(self._to.pkey_column, to_add[i : i + chunk_size])
+                    ),
+                    {self.key: model_id},
                 )
-            elif not v and entry_exists:
-                queries.append(
-                    FoxOrm.db.execute(
-                        self._to.__table__.update().where(self._to.pkey_column == k),
-                        {self.key: None},
-                    )
+            for i in range(0, len(to_delete), chunk_size):
+                await self._to._execute(
+                    database,
+                    'relation.save',
+                    'execute',
+                    table.update().where(
+                        and_(
+                            key == model_id,
+                            expanding_in(
+                                self._to.pkey_column, to_delete[i : i + chunk_size]
+                            ),
+                        )
+                    ),
+                    {self.key: None},
                 )
-        await asyncio.gather(*queries)
+        # pylint: disable=protected-access
+        self._to._invalidate_cache(database)
         self.__modified__ = {}
 
 
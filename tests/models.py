@@ -4,7 +4,8 @@ from typing import Optional, List
 from pydantic import BaseModel, Extra
 
 from fox_orm import FoxOrm, OrmModel
-from fox_orm.fields import pk
+from fox_orm.cache import CacheConfig
+from fox_orm.fields import pk, deferred, unique
 from fox_orm.relations import ManyToMany, OneToMany
 
 
@@ -53,6 +54,20 @@ class E(OrmModel):
     dt: datetime.datetime
 
 
+class Cached(OrmModel):
+    __cache__ = CacheConfig(ttl=60, max_entries=100)
+
+    pkey: Optional[int] = pk
+    text: str
+
+
+class Deferred(OrmModel):
+    pkey: Optional[int] = pk
+    text: str
+    n: Optional[int]
+    data: dict = deferred
+
+
 class ExtraFields(OrmModel):
     class Config:
         extra = Extra.allow
@@ -61,4 +76,11 @@ class ExtraFields(OrmModel):
     _test: str
 
 
+class Upserted(OrmModel):
+    pkey: Optional[int] = pk
+    key: str = unique
+    n: int
+    note: Optional[str]
+
+
 FoxOrm.init_relations()
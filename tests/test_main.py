@@ -3,13 +3,15 @@ import os
 import unittest
 from typing import List, Optional, Dict
 
+from databases import Database
 from sqlalchemy import create_engine, Column, ForeignKey
 
 from fox_orm import FoxOrm
 from fox_orm.exceptions import *
+from fox_orm.internal.replicas import ReplicaPool
 from fox_orm.fields import fkey, null, index, autoincrement, unique
 from fox_orm.relations import ManyToMany
-from tests.models import A, B, C, D, RecursiveTest, RecursiveTest2, ExtraFields, E
+from tests.models import A, B, C, D, RecursiveTest, RecursiveTest2, ExtraFields, E, Cached, Deferred, Upserted
 from tests.utils import schema_to_set
 
 DB_FILE = 'test.db'
@@ -157,6 +159,165 @@ class TestMain(unittest.IsolatedAsyncioTestCase):
         await b_inst.save()
         self.assertIsNotNone(b_inst.pkey)
 
+    async def test_insert_many(self):
+        insts = [A(text='test_insert_many', n=i) for i in range(25)]
+        insts.append(A(pkey=1900, text='test_insert_many', n=25))
+        await A.insert_many(insts, chunk_size=10)
+        for i, inst in enumerate(insts):
+            self.assertTrue(inst.__bound__)
+            inst_2 = await A.get(inst.pkey)
+            self.assertEqual(inst_2.n, i)
+        self.assertEqual(insts[-1].pkey, 1900)
+        with self.assertRaises(OrmException):
+            await A.insert_many(insts)
+
+    async def test_save_all(self):
+        insts = [A(text='test_save_all', n=i) for i in range(10)]
+        await A.insert_many(insts)
+        for inst in insts[:5]:
+            inst.n += 100
+        for inst in insts[5:]:
+            inst.text = 'test_save_all_2'
+            inst.recursive = RecursiveTest(a=[RecursiveTest2(a=str(inst.n))])
+        new_inst = A(text='test_save_all', n=1000)
+        await A.save_all(insts + [new_inst])
+        self.assertTrue(new_inst.__bound__)
+        for inst in insts:
+            self.assertEqual(inst.__modified__, set())
+        objs = await A.select_all(A.c.text == 'test_save_all', order_by=A.c.n)
+        self.assertEqual([x.n for x in objs], [100, 101, 102, 103, 104, 1000])
+        objs = await A.select_all(A.c.text == 'test_save_all_2', order_by=A.c.n)
+        self.assertEqual([x.recursive.a[0].a for x in objs], ['5', '6', '7', '8', '9'])
+
+    async def test_save_all_query_types(self):
+        from sqlalchemy.dialects import postgresql, sqlite
+
+        insts = [A(pkey=i, text='test', n=i) for i in range(1, 3)]
+        query = A._bulk_update_query({'n', 'recursive'}, insts, 'postgresql')
+        sql = str(query.compile(dialect=postgresql.dialect()))
+        self.assertIn('n=CAST(CASE', sql)
+        self.assertIn('AS INTEGER)', sql)
+        self.assertIn('recursive=CAST(CASE', sql)
+        self.assertIn('AS JSON)', sql)
+        query = A._bulk_update_query({'n'}, insts, 'sqlite')
+        self.assertNotIn('CAST', str(query.compile(dialect=sqlite.dialect())))
+
+    async def test_change_detection(self):
+        events = []
+        inst = A(text='test_change_detection', n=0, recursive=RecursiveTest(a=[]))
+        await inst.save()
+        self.assertEqual(inst.__modified__, set())
+        FoxOrm.on('after_query', events.append)
+        try:
+            inst = await A.get(inst.pkey)
+            events.clear()
+            await inst.save()
+            inst.n = 0
+            inst.recursive = RecursiveTest(a=[])
+            await inst.save()
+            self.assertEqual(events, [])
+            inst.recursive.a.append(RecursiveTest2(a='in place'))
+            await inst.save()
+            self.assertEqual(len(events), 1)
+            self.assertIn('recursive', events[0].sql)
+            self.assertNotIn('text', events[0].sql)
+            await inst.save()
+            self.assertEqual(len(events), 1)
+            self.assertEqual((await A.get(inst.pkey)).recursive.a[0].a, 'in place')
+
+            deferred = await Deferred(text='test_change_detection', data={'a': 1}).save()
+            objs = await Deferred.select_all(Deferred.c.text == 'test_change_detection')
+            await Deferred.undefer(objs)
+            objs[0].data['b'] = 2
+            other = await Deferred.select(Deferred.c.pkey == deferred.pkey)
+            other.n = 5
+            events.clear()
+            await Deferred.save_all(objs + [other])
+            self.assertEqual(len(events), 2)
+            await Deferred.save_all(objs)
+            self.assertEqual(len(events), 2)
+        finally:
+            FoxOrm.off('after_query', events.append)
+        obj = await Deferred.get(deferred.pkey, only=['pkey', 'data', 'n'])
+        self.assertEqual(obj.data, {'a': 1, 'b': 2})
+        self.assertEqual(obj.n, 5)
+
+        skipped = await A.select(A.c.pkey == inst.pkey, skip_parsing=True)
+        skipped.recursive['a'].append({'a': 'skip parsing'})
+        await skipped.save()
+        self.assertEqual((await A.get(inst.pkey)).recursive.a[1].a, 'skip parsing')
+
+    async def test_upsert(self):
+        inst = Upserted(key='test_upsert_1', n=1, note='first')
+        await inst.upsert(conflict_on=['key'])
+        self.assertTrue(inst.__bound__)
+        self.assertIsNotNone(inst.pkey)
+        same = Upserted(key='test_upsert_1', n=2, note='second')
+        await same.upsert(conflict_on=['key'], update=['n'])
+        self.assertEqual(same.pkey, inst.pkey)
+        obj = await Upserted.get(inst.pkey)
+        self.assertEqual((obj.n, obj.note), (2, 'first'))
+
+        insts = [Upserted(key=f'test_upsert_{i}', n=i * 10) for i in range(5)]
+        await Upserted.upsert_many(insts, conflict_on=['key'], chunk_size=2)
+        self.assertEqual(insts[1].pkey, inst.pkey)
+        self.assertTrue(all(x.__bound__ and x.pkey is not None for x in insts))
+        self.assertEqual(len({x.pkey for x in insts}), 5)
+        objs = await Upserted.select_all(Upserted.c.key.like('test_upsert_%'), order_by=Upserted.c.key)
+        self.assertEqual([x.n for x in objs], [0, 10, 20, 30, 40])
+        self.assertEqual(objs[1].note, None)
+        self.assertEqual(await Upserted.count(Upserted.c.key.like('test_upsert_%')), 5)
+
+        by_pkey = Upserted(pkey=insts[0].pkey, key='test_upsert_0', n=100)
+        await by_pkey.upsert(conflict_on=['pkey'])
+        self.assertEqual((await Upserted.get(insts[0].pkey)).n, 100)
+
+        with self.assertRaises(OrmException):
+            await Upserted.upsert_many(
+                [Upserted(key='test_upsert_dup', n=0), Upserted(key='test_upsert_dup', n=1)], conflict_on=['key']
+            )
+        with self.assertRaises(OrmException):
+            await Upserted(key='test_upsert_x', n=0).upsert(conflict_on=['unknown'])
+        with self.assertRaises(OrmException):
+            await Upserted(key='test_upsert_x', n=0).upsert(conflict_on=[])
+        with self.assertRaises(OrmException):
+            await Upserted(key='test_upsert_x', n=0).upsert(conflict_on=['note'])
+
+        first = await Upserted(key='test_upsert_pkey', n=0).upsert(conflict_on=['key'])
+        same = Upserted(pkey=first.pkey, key='test_upsert_pkey', n=0)
+        await same.upsert(conflict_on=['pkey'], update=[])
+        self.assertEqual(same.pkey, first.pkey)
+        second = await Upserted(key='test_upsert_pkey_2', n=0).upsert(conflict_on=['key'])
+        second.key = 'test_upsert_pkey'
+        with self.assertRaisesRegex(OrmException, 'conflicts with the row'):
+            await second.upsert(conflict_on=['key'])
+        self.assertEqual(second.pkey, (await Upserted.select(Upserted.c.key == 'test_upsert_pkey_2')).pkey)
+
+    async def test_aggregate(self):
+        from sqlalchemy import func
+
+        await A.insert_many(
+            [A(text='test_aggregate_1', n=i) for i in range(4)] + [A(text='test_aggregate_2', n=10)]
+        )
+        where = A.c.text.like('test_aggregate_%')
+        res = await A.aggregate(
+            sum=A.c.n, avg=A.c.n, total=func.count(), group_by=[A.c.text], where=where, order_by=A.c.text
+        )
+        self.assertEqual(len(res), 2)
+        self.assertEqual(res[0]._fields, ('text', 'sum', 'avg', 'total'))
+        self.assertEqual(tuple(res[0]), ('test_aggregate_1', 6, 1.5, 4))
+        self.assertEqual((res[1].text, res[1].sum, res[1].total), ('test_aggregate_2', 10, 1))
+        res = await A.aggregate(max=A.c.n, group_by=[A.c.text], where=where, having=func.count() > 1)
+        self.assertEqual([tuple(x) for x in res], [('test_aggregate_1', 3)])
+        res = await A.aggregate(min=A.c.n, max=A.c.n, where=where)
+        self.assertEqual((res[0].min, res[0].max), (0, 10))
+        with self.assertRaises(OrmException):
+            await A.aggregate(where=where)
+        with self.assertRaises(OrmException):
+            await A.aggregate(text=A.c.n, group_by=[A.c.text])
+        with self.assertRaises(OrmException):
+            await A.aggregate(sum=A.c.n, group_by=[func.lower(A.c.text)])
+
     async def test_datetime(self):
         dt = datetime.datetime.now()
         inst = E(dt=dt)
@@ -258,6 +419,171 @@ class TestMain(unittest.IsolatedAsyncioTestCase):
         await a_inst_2.b_objs.fetch()
         self.assertNotIn(b_inst, a_inst_2.b_objs)
 
+    async def test_m2m_bulk_save(self):
+        a_inst = A(text='test_m2m_bulk_save', n=0)
+        await a_inst.save()
+        b_insts = []
+        for i in range(20):
+            b_inst = B(text2='test_m2m_bulk_save', n=i)
+            await b_inst.save()
+            b_insts.append(b_inst)
+        await a_inst.b_objs.add(b_insts[0])
+        for b_inst in b_insts:
+            a_inst.b_objs.add(b_inst)
+        await a_inst.b_objs.save()
+        self.assertEqual(await a_inst.b_objs.count(), 20)
+        for b_inst in b_insts[:15]:
+            a_inst.b_objs.delete(b_inst)
+        await a_inst.b_objs.save()
+        self.assertEqual(await a_inst.b_objs.count(), 5)
+
+    async def test_o2m_bulk_save(self):
+        b_inst = B(text2='test_o2m_bulk_save', n=0)
+        await b_inst.save()
+        b_inst_2 = B(text2='test_o2m_bulk_save', n=1)
+        await b_inst_2.save()
+        c_insts = []
+        for i in range(10):
+            c_inst = C()
+            await c_inst.save()
+            c_insts.append(c_inst)
+            b_inst.c_objs.add(c_inst)
+        await b_inst.c_objs.save()
+        self.assertEqual(await b_inst.c_objs.count(), 10)
+        await b_inst_2.c_objs.add(c_insts[0])
+        for c_inst in c_insts[:5]:
+            b_inst.c_objs.delete(c_inst)
+        await b_inst.c_objs.save()
+        self.assertEqual(await b_inst.c_objs.count(), 5)
+        self.assertEqual(await b_inst_2.c_objs.count(), 1)
+
+    async def test_prefetch_related(self):
+        b_insts = []
+        for i in range(3):
+            b_inst = B(text2='test_prefetch_related', n=i)
+            await b_inst.save()
+            b_insts.append(b_inst)
+        for i in range(2):
+            a_inst = A(text='test_prefetch_related', n=i)
+            await a_inst.save()
+            await a_inst.b_objs.add(b_insts[0])
+            await a_inst.b_objs.add(b_insts[1])
+        c_inst = C(b_id=b_insts[1].pkey)
+        await c_inst.save()
+
+        b_insts = await B.select_all(B.c.text2 == 'test_prefetch_related', order_by=B.c.n)
+        await B.prefetch_related(b_insts, 'a_objs', 'c_objs')
+        self.assertEqual([len(x.a_objs) for x in b_insts], [2, 2, 0])
+        self.assertEqual([len(x.c_objs) for x in b_insts], [0, 1, 0])
+        self.assertEqual(b_insts[0].a_objs[0].text, 'test_prefetch_related')
+        self.assertIn(c_inst, b_insts[1].c_objs)
+        with self.assertRaises(OrmException):
+            await B.prefetch_related(b_insts, 'n')
+
+    async def test_annotate_counts(self):
+        b_insts = []
+        for i in range(3):
+            b_inst = B(text2='test_annotate_counts', n=i)
+            await b_inst.save()
+            b_insts.append(b_inst)
+        for i in range(2):
+            a_inst = A(text='test_annotate_counts', n=i)
+            await a_inst.save()
+            await a_inst.b_objs.add(b_insts[0])
+            await a_inst.b_objs.add(b_insts[1])
+        for _ in range(3):
+            await C(b_id=b_insts[1].pkey).save()
+
+        b_insts = await B.select_all(B.c.text2 == 'test_annotate_counts', order_by=B.c.n)
+        with self.assertRaises(NotFetchedException):
+            b_insts[0].a_objs.cached_count
+        queries = []
+        FoxOrm.on('after_query', queries.append)
+        try:
+            await B.annotate_counts(b_insts, 'a_objs', 'c_objs')
+        finally:
+            FoxOrm.off('after_query', queries.append)
+        self.assertEqual([x.operation for x in queries], ['relation.count'] * 2)
+        self.assertEqual([x.a_objs.cached_count for x in b_insts], [2, 2, 0])
+        self.assertEqual([x.c_objs.cached_count for x in b_insts], [0, 3, 0])
+
+        b_insts[2].c_objs.add(await C().save())
+        with self.assertRaises(NotFetchedException):
+            b_insts[2].c_objs.cached_count
+        await b_insts[1].fetch_related('c_objs')
+        self.assertEqual(b_insts[1].c_objs.cached_count, 3)
+        with self.assertRaises(OrmException):
+            await B.annotate_counts(b_insts, 'n')
+
+    async def test_relation_chunks(self):
+        b_insts = [await B(text2='test_relation_chunks', n=i).save() for i in range(3)]
+        a_insts = [await A(text='test_relation_chunks', n=i).save() for i in range(5)]
+        c_insts = [await C().save() for _ in range(5)]
+        events = []
+        FoxOrm.on('after_query', events.append)
+        try:
+            for a_inst in a_insts:
+                b_insts[0].a_objs.add(a_inst)
+            for c_inst in c_insts:
+                b_insts[0].c_objs.add(c_inst)
+            await b_insts[0].a_objs.save(chunk_size=2)
+            await b_insts[0].c_objs.save(chunk_size=2)
+            self.assertEqual(len([x for x in events if x.operation == 'relation.save']), 6)
+            for a_inst in a_insts[:3]:
+                b_insts[0].a_objs.delete(a_inst)
+            await b_insts[0].a_objs.save(chunk_size=2)
+            events.clear()
+            await B.prefetch_related(b_insts, 'a_objs', chunk_size=2)
+            await B.annotate_counts(b_insts, 'c_objs', chunk_size=2)
+            self.assertEqual(len(events), 4)
+        finally:
+            FoxOrm.off('after_query', events.append)
+        self.assertEqual([len(x.a_objs) for x in b_insts], [2, 0, 0])
+        self.assertEqual([x.c_objs.cached_count for x in b_insts], [5, 0, 0])
+
+    async def test_server_side_relation_operations(self):
+        b_insts = [await B(text2='test_server_side', n=i).save() for i in range(3)]
+        a_inst = await A(text='test_server_side', n=0).save()
+        a_inst_2 = await A(text='test_server_side', n=1).save()
+        for b_inst in b_insts[:2]:
+            a_inst.b_objs.add(b_inst)
+        for b_inst in b_insts[1:]:
+            a_inst_2.b_objs.add(b_inst)
+        await a_inst.b_objs.save()
+        await a_inst_2.b_objs.save()
+
+        self.assertTrue(await a_inst.b_objs.has(b_insts[0]))
+        self.assertTrue(await a_inst.b_objs.has(b_insts[1].pkey))
+        self.assertFalse(await a_inst.b_objs.has(b_insts[2]))
+        self.assertEqual(
+            await a_inst.b_objs.intersect(a_inst_2.b_objs, ids_only=True),
+            [b_insts[1].pkey],
+        )
+        common = await a_inst.b_objs.intersect(a_inst_2.b_objs)
+        self.assertEqual([x.n for x in common], [1])
+        self.assertTrue(common[0].__bound__)
+        self.assertEqual(
+            await a_inst.b_objs.union(a_inst_2.b_objs, ids_only=True),
+            sorted(x.pkey for x in b_insts),
+        )
+
+        d_inst = await D().save()
+        c_insts = [await C(b_id=b_insts[0].pkey).save() for _ in range(2)]
+        c_insts.append(await C(b_id=b_insts[0].pkey, d_id=d_inst.pkey).save())
+        await C(d_id=d_inst.pkey).save()
+        self.assertTrue(await b_insts[0].c_objs.has(c_insts[0]))
+        self.assertFalse(await d_inst.c_objs.has(c_insts[0]))
+        self.assertEqual(
+            await b_insts[0].c_objs.intersect(d_inst.c_objs, ids_only=True),
+            [c_insts[2].pkey],
+        )
+        self.assertEqual(len(await b_insts[0].c_objs.union(d_inst.c_objs)), 4)
+
+        with self.assertRaises(OrmException):
+            await a_inst.b_objs.has(c_insts[0])
+        with self.assertRaises(OrmException):
+            await a_inst.b_objs.intersect(b_insts[0].c_objs)
+
     async def test_bad_operation(self):
         a_inst = A(text='test_bad_operation', n=0)
         await a_inst.save()
@@ -313,6 +639,478 @@ class TestMain(unittest.IsolatedAsyncioTestCase):
         for obj in objs:
             self.assertEqual(obj.text, 'test_select_all')
 
+    async def test_select_iter(self):
+        await A.insert_many([A(text='test_select_iter', n=i) for i in range(10)])
+        res = [x async for x in A.select_iter(A.c.text == 'test_select_iter', order_by=A.c.n)]
+        self.assertEqual([x.n for x in res], list(range(10)))
+        self.assertTrue(all(x.__bound__ for x in res))
+        chunks = [
+            x async for x in A.select_iter(A.c.text == 'test_select_iter', chunk_size=4, skip_parsing=True)
+        ]
+        self.assertEqual([len(x) for x in chunks], [4, 4, 2])
+
+    async def test_session(self):
+        inst = A(text='test_session', n=0)
+        await inst.save()
+        inst_id = inst.pkey
+        self.assertIsNot(await A.get(inst_id), await A.get(inst_id))
+        async with FoxOrm.session():
+            inst = await A.get(inst_id)
+            self.assertIs(await A.get(inst_id), inst)
+            inst_2 = await A.get(inst_id, refresh=True)
+            self.assertIsNot(inst_2, inst)
+            self.assertIs(await A.select(A.c.text == 'test_session'), inst_2)
+            self.assertIs((await A.select_all(A.c.text == 'test_session'))[0], inst_2)
+            b_inst = B(text2='test_session', n=0)
+            await b_inst.save()
+            await b_inst.a_objs.add(inst_2)
+            await b_inst.a_objs.fetch()
+            self.assertIs(b_inst.a_objs[0], inst_2)
+            await inst_2.delete()
+            self.assertIsNone(await A.get(inst_id))
+        self.assertIsNone(await A.get(inst_id))
+
+    async def test_cache(self):
+        cache = Cached.__query_cache__
+        self.assertIsNone(A.__query_cache__)
+        inst = Cached(text='test_cache')
+        await inst.save()
+        hits, misses = cache.hits, cache.misses
+        self.assertEqual((await Cached.get(inst.pkey)).text, 'test_cache')
+        self.assertEqual((await Cached.get(inst.pkey)).text, 'test_cache')
+        self.assertEqual(await Cached.count(Cached.c.text == 'test_cache'), 1)
+        self.assertEqual(await Cached.count(Cached.c.text == 'test_cache'), 1)
+        self.assertEqual((cache.hits - hits, cache.misses - misses), (2, 2))
+        inst.text = 'test_cache_2'
+        await inst.save()
+        self.assertEqual((await Cached.get(inst.pkey)).text, 'test_cache_2')
+        self.assertEqual(await Cached.count(Cached.c.text == 'test_cache'), 0)
+        await inst.delete()
+        self.assertIsNone(await Cached.get(inst.pkey))
+
+    async def test_cache_transaction(self):
+        # Transaction is the first query of the test, databases doesn't use
+        # a transaction started after other queries in the same task
+        cache = Cached.__query_cache__
+        with self.assertRaises(ValueError):
+            async with FoxOrm.transaction():
+                inst = await Cached(text='test_cache_transaction').save()
+                hits, misses, size = cache.hits, cache.misses, len(cache)
+                self.assertIsNotNone(await Cached.get(inst.pkey))
+                self.assertIsNotNone(await Cached.get(inst.pkey))
+                self.assertEqual((cache.hits, cache.misses, len(cache)), (hits, misses, size))
+                raise ValueError
+        self.assertIsNone(await Cached.get(inst.pkey))
+
+    async def test_cache_invalidation_after_commit(self):
+        import asyncio
+        import contextvars
+
+        inst = await Cached(text='test_cache_commit_old').save()
+        written = asyncio.Event()
+        read = asyncio.Event()
+
+        async def write():
+            async with FoxOrm.transaction():
+                inst.text = 'test_cache_commit_new'
+                await inst.save()
+                written.set()
+                await read.wait()
+
+        # Task with empty context, databases doesn't use a transaction
+        # started after other queries in the same task
+        task = contextvars.Context().run(asyncio.create_task, write())
+        await written.wait()
+        # Concurrent reader caches the row committed before the transaction
+        self.assertEqual((await Cached.get(inst.pkey)).text, 'test_cache_commit_old')
+        read.set()
+        await task
+        self.assertEqual((await Cached.get(inst.pkey)).text, 'test_cache_commit_new')
+
+    async def test_cache_eviction(self):
+        from fox_orm.cache import CacheConfig, QueryCache
+
+        cache = QueryCache(CacheConfig(ttl=None, max_entries=2))
+        cache.set('a', 1, cache.generation)
+        cache.set('b', 2, cache.generation)
+        self.assertEqual(cache.get('a'), (True, 1))
+        cache.set('c', 3, cache.generation)
+        self.assertEqual(cache.get('b'), (False, None))
+        self.assertEqual(cache.get('a'), (True, 1))
+        generation = cache.generation
+        cache.invalidate()
+        cache.set('d', 4, generation)
+        self.assertEqual(len(cache), 0)
+
+        cache = QueryCache(CacheConfig(ttl=0))
+        cache.set('a', 1, cache.generation)
+        self.assertEqual(cache.get('a'), (False, None))
+        self.assertEqual((cache.hits, cache.misses), (0, 1))
+
+    async def test_statement_cache(self):
+        inst = A(text='test_statement_cache', n=0)
+        await inst.save()
+        await A.get(inst.pkey)
+        hits, misses = FoxOrm.statement_cache.hits, FoxOrm.statement_cache.misses
+        for i in range(3):
+            inst = await A.get(inst.pkey)
+            inst.n = i + 1
+            await inst.save()
+        hits = FoxOrm.statement_cache.hits - hits
+        misses = FoxOrm.statement_cache.misses - misses
+        self.assertEqual(hits + misses, 6)
+        self.assertLessEqual(misses, 1)
+        self.assertEqual((await A.get(inst.pkey)).n, 3)
+
+    async def test_hydrator(self):
+        from pydantic import ValidationError
+
+        inst = A(text='test_hydrator', n=0, recursive=RecursiveTest(a=[RecursiveTest2(a='123')]))
+        await inst.save()
+        inst_2 = A(text='test_hydrator', n=1)
+        await inst_2.save()
+        query = A.__table__.select().where(A.c.text == 'test_hydrator')
+        rows = await FoxOrm.db.fetch_all(query)
+        objs = await A.select_all(query)
+        self.assertIsNotNone(A.__hydrator__)
+        for row, obj in zip(rows, objs):
+            parsed = A.parse_obj(row)
+            self.assertEqual(obj.dict(exclude={'b_objs'}), parsed.dict(exclude={'b_objs'}))
+            self.assertEqual(obj.__fields_set__, parsed.__fields_set__)
+        self.assertIsInstance(objs[0].recursive, RecursiveTest)
+        self.assertIsNone(A.__hydrator__({'pkey': 1, 'text': 'test_hydrator'}))
+        with self.assertRaises(ValidationError):
+            A._from_row({'pkey': 1, 'text': 'test_hydrator', 'n': 'abc'})
+        self.assertIsNone(ExtraFields.__hydrator__)
+
+    async def test_lazy_class_initialization(self):
+        from sqlalchemy import MetaData
+        from fox_orm import OrmModel
+        from fox_orm.fields import pk
+        from fox_orm.internal.table import parse_type
+        from fox_orm.model import _NOT_BUILT
+
+        self.assertIs(parse_type(Optional[int]), parse_type(Optional[int]))
+        self.assertEqual(parse_type(Optional[int]), (int, False))
+        self.assertEqual(parse_type(Dict[str, int]), (Dict[str, int], True))
+
+        class LazyInit(OrmModel):
+            __metadata__ = MetaData()
+            pkey: Optional[int] = pk
+            text: str
+
+        self.assertIs(LazyInit.__dict__['_hydrator'], _NOT_BUILT)
+        hydrator = LazyInit.__hydrator__
+        self.assertIsNotNone(hydrator)
+        self.assertIs(LazyInit.__hydrator__, hydrator)
+        LazyInit.update_forward_refs()
+        self.assertIsNot(LazyInit.__hydrator__, hydrator)
+        self.assertEqual(LazyInit._from_row({'pkey': 1, 'text': 'a'}).text, 'a')
+
+    async def test_lazy_relations(self):
+        inst = B.construct({'pkey': 1, 'text2': 'test_lazy_relations', 'n': 0})
+        self.assertNotIn('a_objs', inst.__dict__)
+        parsed = B._from_row({'pkey': 1, 'text2': 'test_lazy_relations', 'n': 0})
+        self.assertNotIn('a_objs', parsed.__dict__)
+        self.assertEqual(parsed.dict(), {'pkey': 1, 'text2': 'test_lazy_relations', 'n': 0})
+        relation = parsed.a_objs
+        self.assertIs(parsed.__dict__['a_objs'], relation)
+        self.assertIs(parsed.a_objs, relation)
+        self.assertIs(relation._model, parsed)
+        self.assertEqual(parsed.dict(), {'pkey': 1, 'text2': 'test_lazy_relations', 'n': 0})
+
+    async def test_deferred(self):
+        for i in range(3):
+            await Deferred(text='test_deferred', n=i, data={'i': i}).save()
+        objs = await Deferred.select_all(Deferred.c.text == 'test_deferred', order_by=Deferred.c.n)
+        self.assertEqual(len(objs), 3)
+        self.assertNotIn('data', objs[0].dict())
+        self.assertFalse(hasattr(objs[0], 'data'))
+        await objs[0].undefer()
+        self.assertEqual(objs[0].data, {'i': 0})
+        await Deferred.undefer(objs, 'data')
+        self.assertEqual([x.data for x in objs], [{'i': 0}, {'i': 1}, {'i': 2}])
+        objs = await Deferred.select_all(
+            Deferred.c.text == 'test_deferred', order_by=Deferred.c.n, only=['data']
+        )
+        self.assertEqual(objs[1].dict(), {'pkey': objs[1].pkey, 'data': {'i': 1}})
+        obj = await Deferred.get(objs[1].pkey, defer=['text'])
+        self.assertEqual(obj.dict(), {'pkey': objs[1].pkey, 'n': 1})
+        obj.n = 10
+        await obj.save()
+        obj = await Deferred.get(obj.pkey)
+        self.assertEqual(obj.dict(), {'pkey': obj.pkey, 'text': 'test_deferred', 'n': 10})
+        with self.assertRaises(OrmException):
+            await Deferred.select_all(only=['nonexistent'])
+        with self.assertRaises(OrmException):
+            await Deferred.select_all(Deferred.__table__.select(), only=['text'])
+
+    async def test_projection(self):
+        inst = A(text='test_projection', n=0, recursive=RecursiveTest(a=[RecursiveTest2(a='123')]))
+        await inst.save()
+        res = await A.select(A.c.text == 'test_projection', only=['text'])
+        self.assertEqual(res.dict(), {'pkey': inst.pkey, 'text': 'test_projection'})
+        res = await A.select(A.c.text == 'test_projection', defer=['recursive'])
+        self.assertEqual(res.dict(), {'pkey': inst.pkey, 'text': 'test_projection', 'n': 0})
+        await res.undefer('recursive')
+        self.assertEqual(res, inst)
+        res = await A.select(A.c.text == 'test_projection', only=['n'], skip_parsing=True)
+        self.assertEqual(res.dict(), {'pkey': inst.pkey, 'n': 0})
+
+    async def test_paginate(self):
+        await A.insert_many([A(text=f'test_paginate_{i % 3}', n=i % 4) for i in range(20)])
+        where = A.c.text.startswith('test_paginate')
+        for order_by in ([A.c.n.desc(), A.c.text], [A.c.n, A.c.text], A.c.text.desc(), None):
+            full_order_by = order_by if isinstance(order_by, list) else [order_by] if order_by is not None else []
+            expected = await A.select_all(where, order_by=full_order_by + [A.c.pkey])
+            result = []
+            cursor = None
+            while True:
+                page = await A.paginate(where, order_by=order_by, after=cursor, limit=6)
+                result.extend(page)
+                cursor = page.next_cursor
+                if cursor is None:
+                    break
+                self.assertEqual(len(page), 6)
+            self.assertEqual([x.pkey for x in result], [x.pkey for x in expected])
+        page = await A.paginate(where, order_by=A.c.n, limit=5)
+        with self.assertRaises(OrmException):
+            await A.paginate(where, order_by=A.c.text, after=page.next_cursor, limit=5)
+        with self.assertRaises(OrmException):
+            await A.paginate(where, after='invalid', limit=5)
+        with self.assertRaises(OrmException):
+            await A.paginate(where, order_by=B.c.n, limit=5)
+
+    async def test_unit_of_work(self):
+        existing = A(text='test_unit_of_work', n=0)
+        await existing.save()
+        async with FoxOrm.unit_of_work():
+            a = A(text='test_unit_of_work', n=1)
+            b = B(text2='test_unit_of_work', n=2)
+            await b.save()
+            existing.n = 10
+            await b.a_objs.add(a)
+            b.a_objs.add(existing)
+            c = C()
+            b.c_objs.add(c)
+            self.assertFalse(a.__bound__)
+            self.assertFalse(b.__bound__)
+            self.assertEqual(await A.count(A.c.text == 'test_unit_of_work'), 1)
+        self.assertTrue(a.__bound__ and b.__bound__ and c.__bound__)
+        self.assertEqual((await A.get(existing.pkey)).n, 10)
+        self.assertEqual(set(await b.a_objs.fetch_ids()), {a.pkey, existing.pkey})
+        self.assertEqual(await b.c_objs.fetch_ids(), [c.pkey])
+        with self.assertRaises(ValueError):
+            async with FoxOrm.unit_of_work():
+                existing.n = 20
+                raise ValueError
+        self.assertEqual((await A.get(existing.pkey)).n, 10)
+
+        existing.recursive = RecursiveTest(a=[])
+        await existing.save()
+        async with FoxOrm.unit_of_work():
+            loaded = await A.get(existing.pkey)
+            loaded.recursive.a.append(RecursiveTest2(a='in place'))
+            unchanged = await A.select_all(A.c.text == 'test_unit_of_work')
+        self.assertEqual(len(unchanged), 2)
+        self.assertEqual(
+            (await A.get(existing.pkey)).recursive.a, [RecursiveTest2(a='in place')]
+        )
+
+    async def test_replicas(self):
+        import shutil
+        import sqlite3
+
+        replica_files = ['test_replica_0.db', 'test_replica_1.db']
+        for file in replica_files:
+            shutil.copy(DB_FILE, file)
+        default = FoxOrm._databases.pop('default')
+        try:
+            FoxOrm.init(DB_URI, replicas=[f'sqlite:///{x}' for x in replica_files])
+            inst = A(text='test_replicas', n=0)
+            await inst.save()
+            with sqlite3.connect(replica_files[1]) as conn:
+                conn.execute('INSERT INTO a (pkey, text, n) VALUES (?, ?, ?)', (inst.pkey, 'test_replicas', 1))
+            where = A.c.text == 'test_replicas'
+            self.assertIsNone(await A.select(where))
+            self.assertEqual((await A.select(where)).n, 1)
+            self.assertEqual(await A.count(where), 0)
+            self.assertTrue(await A.exists(where))
+            with FoxOrm.use_primary():
+                self.assertEqual((await A.select(where)).n, 0)
+            async with FoxOrm.transaction():
+                self.assertEqual([x.n for x in await A.select_all(where)], [0])
+            self.assertEqual(FoxOrm.replicas.in_flight, [0, 0])
+
+            # Replica results in the cache are not used by primary reads
+            cached = await Cached(text='test_replicas_new').save()
+            for file in replica_files:
+                with sqlite3.connect(file) as conn:
+                    conn.execute('INSERT INTO cached (pkey, text) VALUES (?, ?)', (cached.pkey, 'test_replicas_old'))
+            self.assertEqual((await Cached.get(cached.pkey)).text, 'test_replicas_old')
+            with FoxOrm.use_primary():
+                self.assertEqual((await Cached.get(cached.pkey)).text, 'test_replicas_new')
+            self.assertEqual((await Cached.get(cached.pkey)).text, 'test_replicas_old')
+            pool = ReplicaPool([Database(DB_URI) for _ in range(3)], 'least_busy')
+            pool.in_flight = [2, 0, 1]
+            self.assertEqual(pool._choose(), 1)
+            with self.assertRaises(OrmException):
+                ReplicaPool([Database(DB_URI)], 'unknown')
+        finally:
+            await FoxOrm.database().disconnect()
+            FoxOrm._databases['default'] = default
+            for file in replica_files:
+                os.remove(file)
+
+    async def test_database_binding(self):
+        import asyncio
+        import contextvars
+        import sqlite3
+        from sqlalchemy import MetaData
+        from fox_orm import OrmModel
+        from fox_orm.fields import pk
+
+        names = ['bound', 'shard_0', 'shard_1']
+        for name in names:
+            FoxOrm.init(name=name, uri=f'sqlite:///test_{name}.db')
+        try:
+            bound_metadata = MetaData()
+            shard_metadata = MetaData()
+            FoxOrm.bind_metadata(bound_metadata, 'bound')
+
+            class BoundModel(OrmModel):
+                __metadata__ = bound_metadata
+
+                pkey: Optional[int] = pk
+                text: str
+
+            class ShardedModel(OrmModel):
+                __metadata__ = shard_metadata
+
+                pkey: int = pk
+                text: str
+
+                @classmethod
+                def __shard__(cls, pkey):
+                    return f'shard_{pkey % 2}'
+
+            bound_metadata.create_all(create_engine('sqlite:///test_bound.db'))
+            for name in names[1:]:
+                shard_metadata.create_all(create_engine(f'sqlite:///test_{name}.db'))
+
+            inst = BoundModel(text='test_database_binding')
+            await inst.save()
+            self.assertEqual((await BoundModel.get(inst.pkey)).text, 'test_database_binding')
+
+            for i in range(1, 5):
+                await ShardedModel(pkey=i, text=f'test_{i}').save()
+            await ShardedModel.insert_many([ShardedModel(pkey=i, text=f'test_{i}') for i in range(5, 7)])
+            for name, expected in (('shard_0', [2, 4, 6]), ('shard_1', [1, 3, 5])):
+                with sqlite3.connect(f'test_{name}.db') as conn:
+                    rows = conn.execute('SELECT pkey FROM sharded_model ORDER BY pkey').fetchall()
+                self.assertEqual([x[0] for x in rows], expected)
+            obj = await ShardedModel.get(3)
+            self.assertEqual(obj.text, 'test_3')
+            obj.text = 'changed'
+            await obj.save()
+            self.assertEqual((await ShardedModel.get(3)).text, 'changed')
+            with self.assertRaises(OrmException):
+                await ShardedModel.select_all()
+            with FoxOrm.shard('shard_0'):
+                objs = await ShardedModel.select_all(order_by=ShardedModel.c.pkey)
+            self.assertEqual([x.pkey for x in objs], [2, 4, 6])
+            await obj.delete()
+            self.assertIsNone(await ShardedModel.get(3))
+            with self.assertRaises(OrmException):
+                FoxOrm.database('nonexistent')
+
+            # Unit of work is rolled back in all databases
+            existing = await A(text='test_database_binding', n=0).save()
+
+            async def flush_failing():
+                async with FoxOrm.unit_of_work():
+                    BoundModel(text='test_unit_of_work_databases')
+                    A(pkey=existing.pkey, text='test_database_binding', n=1)
+
+            # Task with empty context, databases doesn't use a transaction
+            # started after other queries in the same task
+            with self.assertRaises(sqlite3.IntegrityError):
+                await contextvars.Context().run(asyncio.create_task, flush_failing())
+            self.assertEqual(await BoundModel.count(BoundModel.c.text == 'test_unit_of_work_databases'), 0)
+        finally:
+            for name in names:
+                await FoxOrm._databases.pop(name).disconnect()
+                os.remove(f'test_{name}.db')
+
+    async def test_events(self):
+        import json
+        import tempfile
+        from fox_orm.events import SpanRecorder
+
+        events = []
+        hydrated = []
+        FoxOrm.on('after_query', events.append)
+        FoxOrm.on('after_hydrate', hydrated.append)
+        try:
+            inst = A(text='test_events', n=1)
+            await inst.save()
+            await A(text='test_events', n=2).save()
+            objs = await A.select_all(A.c.text == 'test_events')
+            self.assertEqual(len(objs), 2)
+            self.assertEqual(await A.count(A.c.text == 'test_events'), 2)
+            self.assertTrue(await A.exists(A.c.text == 'test_events'))
+            self.assertEqual(len([x async for x in A.select_iter(A.c.text == 'test_events')]), 2)
+            b = B(text2='test_events', n=0)
+            await b.save()
+            await b.a_objs.fetch()
+            await inst.delete()
+            self.assertEqual(
+                [x.operation for x in events],
+                ['save', 'save', 'select', 'count', 'exists', 'select_iter', 'save', 'relation.fetch', 'delete'],
+            )
+            select = events[2]
+            self.assertIs(select.model, A)
+            self.assertIn('SELECT', select.sql)
+            self.assertEqual(select.param_count, 1)
+            self.assertEqual(select.row_count, 2)
+            self.assertGreater(select.db_time, 0)
+            self.assertEqual(select.database, 'default')
+            self.assertEqual(select.dialect, 'sqlite')
+            self.assertEqual(events[5].row_count, 2)
+            self.assertEqual(events[7].row_count, 0)
+            self.assertEqual([x.operation for x in hydrated], ['select', 'select_iter', 'relation.fetch'])
+            self.assertIs(hydrated[0], select)
+            self.assertGreater(select.hydration_time, 0)
+            with self.assertRaises(OrmException):
+                FoxOrm.on('unknown', events.append)
+        finally:
+            FoxOrm.off('after_query', events.append)
+            FoxOrm.off('after_hydrate', hydrated.append)
+        self.assertFalse(FoxOrm.events.active)
+
+        recorder = SpanRecorder('test')
+        recorder.attach()
+        try:
+            await A.get(1)
+        finally:
+            recorder.detach()
+        await A.get(1)
+        self.assertEqual(len(recorder.events), 1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'spans.json')
+            recorder.export(path)
+            with open(path) as f:
+                data = json.load(f)
+        spans = data['resourceSpans'][0]['scopeSpans'][0]['spans']
+        self.assertEqual(len(spans), 1)
+        self.assertEqual(spans[0]['name'], 'A.get')
+        self.assertEqual(len(spans[0]['traceId']), 32)
+        self.assertEqual(len(spans[0]['spanId']), 16)
+        self.assertGreaterEqual(int(spans[0]['endTimeUnixNano']), int(spans[0]['startTimeUnixNano']))
+        attributes = {x['key']: x['value'] for x in spans[0]['attributes']}
+        self.assertEqual(attributes['db.system'], {'stringValue': 'sqlite'})
+        self.assertEqual(attributes['fox_orm.param_count'], {'intValue': '1'})
+
     async def test_select_nonexistent(self):
         res = await A.select_all(A.c.text == 'test_select_nonexistent')
         self.assertEqual(len(res), 0)